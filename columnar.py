@@ -0,0 +1,238 @@
+# columnar.py
+# Parquet / Arrow IPC output: a normalized `rtos` table plus a typed `scope_items` table,
+# so "all RTOs delivering X in WA" is a columnar scan instead of re-parsing CSV cells.
+#
+#   python columnar.py data/rto_with_qualifications_and_courses.csv data/columnar [--format arrow]
+
+import os
+import re
+import sys
+import csv
+from datetime import date, datetime
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.ipc as ipc
+from scraper import PHASE2_COLUMNS, SUMMARY_COLUMNS
+from records import parse_scope_cell
+
+# ------------------------
+# CONFIG
+# ------------------------
+BATCH_ROWS = 5000             # rows buffered per table before a record batch is flushed
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+DATE_COLUMNS = {"Initial Registration Date", "Start Date", "End Date"}
+# ABN/ACN come out of the default CSV parse as floats ("12862898150.0")
+DIGIT_COLUMNS = {"ABN", "ACN"}
+
+
+def _snake(name):
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])|[^A-Za-z0-9]+", "_", name).strip("_").lower()
+
+
+RTO_SCHEMA = pa.schema(
+    [("code", pa.string())] + [
+        (_snake(col), pa.date32() if col in DATE_COLUMNS else pa.string())
+        for col in SUMMARY_COLUMNS if col != "Code"
+    ]
+)
+
+SCOPE_SCHEMA = pa.schema([
+    ("rto_code", pa.string()),
+    ("component_type", pa.dictionary(pa.int8(), pa.string())),
+    ("code", pa.string()),
+    ("title", pa.string()),
+    ("status", pa.dictionary(pa.int8(), pa.string())),
+    ("status_label", pa.dictionary(pa.int8(), pa.string())),
+    ("component_type_label", pa.dictionary(pa.int8(), pa.string())),
+    ("extent", pa.dictionary(pa.int8(), pa.string())),
+    ("extent_label", pa.dictionary(pa.int8(), pa.string())),
+    ("start_date", pa.date32()),
+    ("end_date", pa.date32()),
+    ("is_implicit", pa.bool_()),
+    ("is_international", pa.bool_()),
+    ("delivery_act", pa.bool_()),
+    ("delivery_nsw", pa.bool_()),
+    ("delivery_nt", pa.bool_()),
+    ("delivery_qld", pa.bool_()),
+    ("delivery_sa", pa.bool_()),
+    ("delivery_tas", pa.bool_()),
+    ("delivery_vic", pa.bool_()),
+    ("delivery_wa", pa.bool_()),
+    ("nrt_id", pa.string()),
+])
+
+# ------------------------
+# VALUE PARSING
+# ------------------------
+def parse_date(value):
+    """
+    Parse the dates we see in the export ("5/11/2014"), the RTO pages ("17/Dec/2020")
+    and the scope API ("2030-12-31"). Returns None for blanks and anything unrecognised.
+    """
+    if isinstance(value, date):
+        return value
+    value = (value or "").strip()
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d/%b/%Y"):
+        try:
+            return datetime.strptime(value[:10] if fmt == "%Y-%m-%d" else value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    value = (value or "").strip().lower()
+    if value in ("true", "1"):
+        return True
+    if value in ("false", "0"):
+        return False
+    return None
+
+
+def _digits(value):
+    value = ("" if value is None else str(value)).strip()
+    if value.endswith(".0"):
+        value = value[:-2]
+    return value or None
+
+
+# ------------------------
+# WRITER
+# ------------------------
+class _TableSink:
+    def __init__(self, path, schema, fmt):
+        self.schema = schema
+        self.columns = {name: [] for name in schema.names}
+        self.rows = 0
+        self.closed = False
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(path, schema, compression="zstd")
+        else:
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = ipc.new_file(self._sink, schema)
+
+    def append(self, row):
+        for name, value in zip(self.schema.names, row):
+            self.columns[name].append(value)
+        self.rows += 1
+        if len(self.columns[self.schema.names[0]]) >= BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.columns[self.schema.names[0]]:
+            return
+        batch = pa.record_batch([self.columns[name] for name in self.schema.names], schema=self.schema)
+        self._writer.write_batch(batch)
+        self.columns = {name: [] for name in self.schema.names}
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        self._writer.close()
+        if hasattr(self, "_sink"):
+            self._sink.close()
+
+
+class ColumnarWriter:
+    """
+    Streaming sink with the same writerow() interface as scraper.StreamingCSVWriter:
+    takes PHASE2_COLUMNS-ordered values and splits them into the rtos / scope_items tables.
+    """
+    def __init__(self, out_dir, fmt="parquet"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown columnar format {fmt!r}; expected one of {sorted(FORMATS)}")
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        ext = FORMATS[fmt]
+        self.rtos = _TableSink(os.path.join(out_dir, f"rtos{ext}"), RTO_SCHEMA, fmt)
+        self.scope_items = _TableSink(os.path.join(out_dir, f"scope_items{ext}"), SCOPE_SCHEMA, fmt)
+
+    def writerow(self, values):
+        record = dict(zip(PHASE2_COLUMNS, values))
+        rto_code = str(record["Code"]).strip().zfill(4)
+
+        row = [rto_code]
+        for col in SUMMARY_COLUMNS:
+            if col == "Code":
+                continue
+            value = record.get(col)
+            if col in DATE_COLUMNS:
+                row.append(parse_date(value))
+            elif col in DIGIT_COLUMNS:
+                row.append(_digits(value))
+            else:
+                row.append(None if value in (None, "") else str(value))
+        self.rtos.append(row)
+
+        for cell in (record.get("Qualifications"), record.get("Courses")):
+            for item in parse_scope_cell(cell):
+                self.scope_items.append([
+                    rto_code,
+                    item["componentType"] or None,
+                    item["code"],
+                    item["title"],
+                    item["status"] or None,
+                    item["statusLabel"] or None,
+                    item["componentTypeLabel"] or None,
+                    item["extent"] or None,
+                    item["extentLabel"] or None,
+                    parse_date(item["startDate"]),
+                    parse_date(item["endDate"]),
+                    parse_bool(item["isImplicit"]),
+                    parse_bool(item["isInternational"]),
+                    parse_bool(item["deliveryAct"]),
+                    parse_bool(item["deliveryNsw"]),
+                    parse_bool(item["deliveryNt"]),
+                    parse_bool(item["deliveryQld"]),
+                    parse_bool(item["deliverySa"]),
+                    parse_bool(item["deliveryTas"]),
+                    parse_bool(item["deliveryVic"]),
+                    parse_bool(item["deliveryWa"]),
+                    item["nrtId"] or None,
+                ])
+
+    def close(self):
+        self.rtos.close()
+        self.scope_items.close()
+
+    def finish(self):
+        self.close()
+        print(f"✅ Columnar tables saved: {self.out_dir} "
+              f"({self.rtos.rows} rtos, {self.scope_items.rows} scope items)")
+        return self.out_dir
+
+
+def convert_csv(csv_path, out_dir, fmt="parquet"):
+    """
+    Convert an existing scraper CSV snapshot into columnar tables, row by row.
+    """
+    csv.field_size_limit(sys.maxsize)
+    writer = ColumnarWriter(out_dir, fmt)
+    try:
+        with open(csv_path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            positions = [header.index(col) for col in PHASE2_COLUMNS]
+            for values in reader:
+                writer.writerow([values[i] for i in positions])
+    finally:
+        writer.close()
+    return writer.finish()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert a scraper CSV into Parquet/Arrow tables.")
+    parser.add_argument("csv_path")
+    parser.add_argument("out_dir")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    args = parser.parse_args()
+    convert_csv(args.csv_path, args.out_dir, args.format)
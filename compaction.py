@@ -0,0 +1,192 @@
+# compaction.py
+# Pre-LLM compaction for rto_scrape.py: prune crawled section markdown down to the data the
+# schema asks for, derive a minimal instruction from the Pydantic model, and count tokens.
+
+import re
+import typing
+
+# ------------------------
+# CONFIG
+# ------------------------
+# Tags that never hold RTO data; passed to CrawlerRunConfig(excluded_tags=...)
+EXCLUDED_TAGS = ["nav", "header", "footer", "aside", "script", "style", "noscript", "form", "svg"]
+
+# Headings whose whole subsection is dropped (page chrome and the tables RTO_Model doesn't cover)
+EXCLUDED_HEADINGS = re.compile(
+    r"^(units?\b|skill ?sets?\b|accredited (course )?modules?\b|feedback\b|was this page helpful|"
+    r"connect with us|related (links|sites)|skip to|back to top|share this)",
+    re.I,
+)
+# Sections whose links carry data (the Web Address / Registration Manager links on /summary)
+KEEP_LINKS_SECTIONS = {"summary"}
+
+# Field-name words rendered as acronyms in the JSON keys ("rto_type" -> "RTO Type")
+KEY_ACRONYMS = {"abn", "acn", "rto", "url"}
+
+_MD_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_MD_ANCHOR_LINK = re.compile(r"\[[^\]]*\]\(#[^)]*\)")
+_MD_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_MD_LINK = re.compile(r"\[([^\]]*)\]\((?:[^()\s]|\([^)]*\))*(?:\s+\"[^\"]*\")?\)")
+_BARE_SYMBOLS = re.compile(r"^[\s*_\-|=>#•·]*$")
+
+
+# ------------------------
+# MARKDOWN PRUNING
+# ------------------------
+def compact_markdown(markdown, keep_links=False):
+    """
+    Drop excluded subsections (Units, Skill Sets, page chrome), images, bare link targets
+    (unless keep_links) and decorative lines; collapse runs of blank lines.
+    """
+    out = []
+    skip_level = None
+    for line in (markdown or "").splitlines():
+        heading = _MD_HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            if skip_level is not None and level <= skip_level:
+                skip_level = None
+            if skip_level is None and EXCLUDED_HEADINGS.match(heading.group(2)):
+                skip_level = level
+        if skip_level is not None:
+            continue
+
+        line = _MD_ANCHOR_LINK.sub("", _MD_IMAGE.sub("", line))
+        if not keep_links:
+            line = _MD_LINK.sub(r"\1", line)
+        line = line.rstrip()
+        if line and _BARE_SYMBOLS.match(line) and not line.lstrip().startswith("|"):
+            continue
+        if line or (out and out[-1]):
+            out.append(line)
+    return "\n".join(out).strip()
+
+
+def compact_section(section, markdown):
+    return compact_markdown(markdown, keep_links=section in KEEP_LINKS_SECTIONS)
+
+
+# ------------------------
+# SCHEMA-DERIVED PROMPT
+# ------------------------
+def json_key(field_name):
+    """RTO_Model field name -> the Title Case key the rest of the pipeline reads."""
+    return " ".join(w.upper() if w in KEY_ACRONYMS else w.capitalize() for w in field_name.split("_"))
+
+
+def _list_item_model(annotation):
+    for arg in typing.get_args(annotation):
+        if isinstance(arg, type) and hasattr(arg, "model_fields"):
+            return arg
+    return None
+
+
+# "..., found in Summary section (/summary)" -> grouped under one "From /summary:" line
+_FOUND_IN = re.compile(r",?\s*found in (\w+) section \((/\w+)\)\s*$", re.I)
+
+
+def build_schema_prompt(model, rules=(), exclude=()):
+    """
+    Minimal instruction generated from a Pydantic model: output keys grouped by the page
+    section their description names, nested list models spelled out, then a few rules.
+    Fields named in `exclude` are left out (they're filled some other way).
+    """
+    lines = [
+        "Extract one Australian Registered Training Organisation (RTO) from the section-tagged pages below.",
+        "Return ONE JSON object with exactly these keys, and nothing else. "
+        "Use null when a value is not on the page; never guess.",
+    ]
+    current_section = None
+    for name, field in model.model_fields.items():
+        if name in exclude:
+            continue
+        description = field.description or ""
+        found_in = _FOUND_IN.search(description)
+        section = found_in.group(1).title() if found_in else None
+        if found_in:
+            description = description[:found_in.start()]
+        if section != current_section:
+            lines.append(f"From the {section} section:" if section else "Other:")
+            current_section = section
+
+        item_model = _list_item_model(field.annotation)
+        if item_model is not None:
+            item_keys = ", ".join(f'"{json_key(n)}"' for n in item_model.model_fields)
+            lines.append(f'- "{json_key(name)}": list of objects with keys {item_keys}')
+        else:
+            lines.append(f'- "{json_key(name)}": {description}')
+    if rules:
+        lines.append("Rules:")
+        lines.extend(f"- {rule}" for rule in rules)
+    return "\n".join(lines)
+
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+def _json_type(annotation):
+    types = [_JSON_TYPES.get(arg, "string") for arg in typing.get_args(annotation) if arg is not type(None)]
+    return types[0] if types else _JSON_TYPES.get(annotation, "string")
+
+
+def compact_json_schema(model, exclude=()):
+    """
+    Description-free JSON schema keyed like build_schema_prompt, so the schema the strategy
+    appends to the prompt doesn't repeat every field description a second time.
+    """
+    properties = {}
+    for name, field in model.model_fields.items():
+        if name in exclude:
+            continue
+        item_model = _list_item_model(field.annotation)
+        if item_model is not None:
+            properties[json_key(name)] = {"type": "array", "items": compact_json_schema(item_model)}
+        elif typing.get_origin(field.annotation) is list:
+            properties[json_key(name)] = {"type": "array", "items": {"type": "string"}}
+        else:
+            properties[json_key(name)] = {"type": _json_type(field.annotation)}
+    return {"type": "object", "properties": properties}
+
+
+# ------------------------
+# TOKEN COUNTS
+# ------------------------
+_encoding = None
+
+
+def count_tokens(text):
+    """
+    cl100k_base token count when tiktoken and its BPE file are available, else the
+    usual ~4 characters per token estimate. Only used for before/after reporting.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text or "", disallowed_special=()))
+    return len(text or "") // 4
+
+
+class CompactionStats:
+    """Running before/after token totals across extractions."""
+    def __init__(self):
+        self.calls = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def add(self, before, after):
+        self.calls += 1
+        self.tokens_before += before
+        self.tokens_after += after
+
+    @property
+    def saved_pct(self):
+        return 100.0 * (1 - self.tokens_after / self.tokens_before) if self.tokens_before else 0.0
+
+    def summary(self):
+        return (f"{self.calls} prompts compacted: {self.tokens_before} → {self.tokens_after} tokens "
+                f"({self.saved_pct:.0f}% fewer)")
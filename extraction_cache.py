@@ -0,0 +1,97 @@
+# extraction_cache.py
+# Persistent, content-addressed cache for LLM extractions: the key is a hash of the cleaned page
+# content, the instruction, the schema and the provider/model, so unchanged pages are never re-billed.
+
+import os
+import re
+import json
+import time
+import hashlib
+from lru_store import LRUStore
+
+# ------------------------
+# CONFIG
+# ------------------------
+CACHE_PATH = os.path.join(".cache", "llm_extractions.sqlite")
+CACHE_MAX_BYTES = 256 * 1024 * 1024   # LRU-evict least recently used extractions beyond this
+
+# Stored alongside key/last_access/size (see lru_store.py)
+_COLUMNS = ["url TEXT", "blocks TEXT NOT NULL", "stored_at REAL NOT NULL"]
+
+_BLANK_LINES = re.compile(r"\n{3,}")
+_TRAILING_SPACE = re.compile(r"[ \t]+\n")
+
+
+def normalize_content(content):
+    """
+    Strip whitespace noise that changes between crawls of the same page, so an
+    unchanged page hashes the same on every run.
+    """
+    content = (content or "").replace("\r\n", "\n").replace("\r", "\n")
+    content = _TRAILING_SPACE.sub("\n", content)
+    return _BLANK_LINES.sub("\n\n", content).strip()
+
+
+def extraction_key(content, instruction, schema, provider, base_url=None):
+    """sha256 over everything that can change what the LLM returns."""
+    digest = hashlib.sha256()
+    for part in (
+        normalize_content(content),
+        instruction or "",
+        json.dumps(schema, sort_keys=True, separators=(",", ":")),
+        provider or "",
+        base_url or "",
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def strategy_key(strategy, content, llm_config=None):
+    """
+    extraction_key for a crawl4ai LLMExtractionStrategy, on llm_config when given (the
+    provider that actually answered) instead of the strategy's own.
+    """
+    llm_config = llm_config or strategy.llm_config
+    return extraction_key(content, strategy.instruction, strategy.schema,
+                          llm_config.provider, getattr(llm_config, "base_url", None))
+
+
+class ExtractionCache:
+    """
+    Key -> extracted blocks store backed by SQLite (an lru_store.LRUStore). Safe to share
+    across threads and coroutines; only successful extractions should be put().
+    """
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._store = LRUStore(path, "extractions", _COLUMNS, max_bytes)
+
+    @property
+    def evictions(self):
+        return self._store.evictions
+
+    def get(self, key):
+        row = self._store.get(key, ["blocks"])
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, blocks, url=None):
+        payload = json.dumps(blocks, ensure_ascii=False)
+        self._store.put(key, len(payload.encode("utf-8")), url=url, blocks=payload, stored_at=time.time())
+        self.stores += 1
+
+    def close(self):
+        self._store.close()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "stores": self.stores, "evictions": self.evictions}
+
+    def summary(self):
+        return (f"{self.hits} extraction cache hits, {self.misses} misses, "
+                f"{self.stores} stored, {self.evictions} evictions")
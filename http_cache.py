@@ -0,0 +1,262 @@
+# http_cache.py
+# Persistent on-disk HTTP response cache (SQLite) with TTLs, ETag/Last-Modified revalidation,
+# size-bounded LRU eviction and an offline replay-only mode. Plugs into httpx as a transport.
+
+import os
+import json
+import time
+import httpx
+from lru_store import LRUStore
+
+# ------------------------
+# CONFIG
+# ------------------------
+CACHE_PATH = os.path.join(".cache", "http_cache.sqlite")
+CACHE_TTL = 12 * 3600                 # seconds a stored response is served without revalidation
+CACHE_MAX_BYTES = 512 * 1024 * 1024   # LRU-evict least recently used bodies beyond this
+CACHEABLE_STATUSES = (200, 404)       # 404 is a meaningful "no scope" answer for the scope API
+
+# Stored alongside key/last_access/size (see lru_store.py)
+_COLUMNS = [
+    "url TEXT NOT NULL", "status INTEGER NOT NULL", "headers TEXT NOT NULL", "body BLOB NOT NULL",
+    "etag TEXT", "last_modified TEXT", "stored_at REAL NOT NULL",
+]
+_FIELDS = [column.split()[0] for column in _COLUMNS]
+
+# Hop-by-hop / encoding headers that no longer describe the stored (decoded) body
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+class CacheEntry:
+    __slots__ = ("url", "status", "headers", "body", "etag", "last_modified", "stored_at")
+
+    def __init__(self, url, status, headers, body, etag, last_modified, stored_at):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+
+class ResponseCache:
+    """
+    URL-keyed response store backed by SQLite. Safe to share across threads and event loops.
+
+    key_func maps a request URL to its cache key (defaults to the URL itself), so callers can
+    fold volatile query parameters together and still revalidate against yesterday's ETag.
+    offline=True never touches the network: hits are replayed, misses become 504s.
+    """
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES, offline=False, key_func=None):
+        self.path = path
+        self.ttl = ttl
+        self.offline = offline
+        self.key_func = key_func or (lambda url: url)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stores = 0
+        self._store = LRUStore(path, "responses", _COLUMNS, max_bytes)
+
+    @property
+    def evictions(self):
+        return self._store.evictions
+
+    # ---- storage ---------------------------------------------------------
+    def get(self, url):
+        row = self._store.get(self.key_func(url), _FIELDS)
+        if row is None:
+            return None
+        url, status, headers, body, etag, last_modified, stored_at = row
+        return CacheEntry(url, status, json.loads(headers), body, etag, last_modified, stored_at)
+
+    def put(self, url, status, headers, body):
+        headers = {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS}
+        now = time.time()
+        self._store.put(self.key_func(url), len(body), url=url, status=status, headers=json.dumps(headers),
+                        body=body, etag=headers.get("etag"), last_modified=headers.get("last-modified"),
+                        stored_at=now)
+        self.stores += 1
+        return CacheEntry(url, status, headers, body, headers.get("etag"), headers.get("last-modified"), now)
+
+    def refresh(self, url):
+        """Mark an entry as just revalidated (304) so its TTL restarts."""
+        self._store.update(self.key_func(url), stored_at=time.time())
+
+    def is_fresh(self, entry):
+        return self.ttl is not None and time.time() - entry.stored_at < self.ttl
+
+    def close(self):
+        self._store.close()
+
+    # ---- helpers for the transports --------------------------------------
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def as_response(self, entry, request, source="cache"):
+        """Rebuild a stored entry; source is "cache", "revalidated" (304) or "network" (just stored)."""
+        return httpx.Response(entry.status, headers=entry.headers, content=entry.body, request=request,
+                              extensions={"cache_source": source})
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+    def summary(self):
+        return (f"{self.hits} cache hits, {self.revalidated} revalidated (304), "
+                f"{self.misses} misses, {self.evictions} evictions")
+
+
+def _offline_miss(request):
+    return httpx.Response(504, request=request, content=b"offline: not in cache",
+                          extensions={"offline_miss": True})
+
+
+def _store_on_complete(cache, url, response):
+    """
+    Callback for the tee streams: store the raw body decoded (Content-Encoding undone the
+    way httpx does it for callers), like every other entry.
+    """
+    status, headers = response.status_code, response.headers
+
+    def store(raw):
+        body = httpx.Response(status, headers=headers, stream=httpx.ByteStream(raw)).read()
+        cache.put(url, status, dict(headers), body)
+    return store
+
+
+class _TeeStream(httpx.SyncByteStream):
+    """
+    Passes a response stream through to the caller chunk by chunk and hands the whole raw
+    body to on_complete once it has been read to the end (a partial read stores nothing).
+    """
+    def __init__(self, stream, on_complete):
+        self._stream = stream
+        self._on_complete = on_complete
+
+    def __iter__(self):
+        chunks = []
+        for chunk in self._stream:
+            chunks.append(chunk)
+            yield chunk
+        self._on_complete(b"".join(chunks))
+
+    def close(self):
+        self._stream.close()
+
+
+class _AsyncTeeStream(httpx.AsyncByteStream):
+    """Async twin of _TeeStream."""
+    def __init__(self, stream, on_complete):
+        self._stream = stream
+        self._on_complete = on_complete
+
+    async def __aiter__(self):
+        chunks = []
+        async for chunk in self._stream:
+            chunks.append(chunk)
+            yield chunk
+        self._on_complete(b"".join(chunks))
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+
+# ------------------------
+# HTTPX TRANSPORTS
+# ------------------------
+class CachingTransport(httpx.BaseTransport):
+    """
+    Wraps a sync httpx transport with ResponseCache lookups for GET requests.
+    """
+    def __init__(self, inner, cache):
+        self.inner = inner
+        self.cache = cache
+
+    def handle_request(self, request):
+        if request.method != "GET":
+            return self.inner.handle_request(request)
+
+        url = str(request.url)
+        entry = self.cache.get(url)
+        if entry is not None and (self.cache.offline or self.cache.is_fresh(entry)):
+            self.cache.hits += 1
+            return self.cache.as_response(entry, request)
+        if self.cache.offline:
+            self.cache.misses += 1
+            return _offline_miss(request)
+
+        if entry is not None:
+            request.headers.update(self.cache.conditional_headers(entry))
+        response = self.inner.handle_request(request)
+
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            self.cache.refresh(url)
+            self.cache.revalidated += 1
+            return self.cache.as_response(entry, request, source="revalidated")
+
+        self.cache.misses += 1
+        if response.status_code not in CACHEABLE_STATUSES:
+            return response
+        return httpx.Response(
+            response.status_code, headers=response.headers, extensions={**response.extensions, "cache_source": "network"},
+            stream=_TeeStream(response.stream, _store_on_complete(self.cache, url, response)),
+        )
+
+    def close(self):
+        self.inner.close()
+
+
+class AsyncCachingTransport(httpx.AsyncBaseTransport):
+    """
+    Async twin of CachingTransport. SQLite calls are short and run inline.
+    """
+    def __init__(self, inner, cache):
+        self.inner = inner
+        self.cache = cache
+
+    async def handle_async_request(self, request):
+        if request.method != "GET":
+            return await self.inner.handle_async_request(request)
+
+        url = str(request.url)
+        entry = self.cache.get(url)
+        if entry is not None and (self.cache.offline or self.cache.is_fresh(entry)):
+            self.cache.hits += 1
+            return self.cache.as_response(entry, request)
+        if self.cache.offline:
+            self.cache.misses += 1
+            return _offline_miss(request)
+
+        if entry is not None:
+            request.headers.update(self.cache.conditional_headers(entry))
+        response = await self.inner.handle_async_request(request)
+
+        if response.status_code == 304 and entry is not None:
+            await response.aclose()
+            self.cache.refresh(url)
+            self.cache.revalidated += 1
+            return self.cache.as_response(entry, request, source="revalidated")
+
+        self.cache.misses += 1
+        if response.status_code not in CACHEABLE_STATUSES:
+            return response
+        return httpx.Response(
+            response.status_code, headers=response.headers, extensions={**response.extensions, "cache_source": "network"},
+            stream=_AsyncTeeStream(response.stream, _store_on_complete(self.cache, url, response)),
+        )
+
+    async def aclose(self):
+        await self.inner.aclose()
@@ -0,0 +1,309 @@
+# hybrid.py
+# Build RTO_Model records from the training.gov.au export + scope APIs (scraper.py), and only send
+# the fields the APIs leave empty to the crawl4ai/LLM extractor (rto_scrape.py).
+#
+#   python hybrid.py [--codes 0049 0115] [--limit N] [--no-llm] [--offline]
+
+import os
+import re
+import json
+import asyncio
+import argparse
+from datetime import datetime
+import transport
+from records import split_components
+from metrics import METRICS
+from scraper import (SCOPE_API_TEMPLATE, SCOPE_CONCURRENCY, SCOPE_RATE_PER_HOST, HostRateLimiter, ScopeFetchError,
+                     get_all_rtos, iter_scope_items_async, open_http_cache)
+
+# ------------------------
+# CONFIG
+# ------------------------
+HYBRID_OUTPUT_PATH = os.path.join("data", "rto_hybrid.jsonl")
+HYBRID_ERRORS_PATH = os.path.join("data", "rto_hybrid_errors.jsonl")   # RTOs whose scope listing failed
+SCOPE_FETCH_ATTEMPTS = 2      # whole-listing attempts per RTO (each page already retries in scraper.py)
+RTO_WINDOW = 64               # RTOs in flight at once (API fetch + any LLM fill)
+
+# Export column -> RTO_Model key (the Title Case keys rto_scrape.py's extraction returns).
+# The export has no chief executive title; "CEO Mobile" only stands in for a missing CEO phone.
+EXPORT_TO_MODEL = {
+    "Organisation Code": "Code",
+    "Legal Name": "Legal Name",
+    "Business Name(s)": "Business Name",
+    "Status": "Status",
+    "ABN": "ABN",
+    "ACN": "ACN",
+    "RTO Type": "RTO Type",
+    "URL": "Web Address",
+    "Registration Manager": "Registration Manager",
+    "Initial Registration Date": "Initial Registration Date",
+    "Registration Start Date": "Start Date",
+    "Registration End Date": "End Date",
+    "Legal Authority": "Legal Authority",
+    "CEO Contact Name": "Chief Executive Contact Name",
+    "CEO Phone": "Chief Executive Phone",
+    "CEO Email": "Chief Executive Email",
+    "Registration Enquiries Contact Name": "Registration Enquiries Contact Name",
+    "Registration Enquiries Contact Role Job Title": "Registration Enquiries Title",
+    "Registration Enquiries Phone": "Registration Enquiries Phone",
+    "Registration Enquiries Email": "Registration Enquiries Email",
+    "Public Enquiries Contact Name": "Public Enquiries Contact Name",
+    "Public Enquiries Contact Role Job Title": "Public Enquiries Title",
+    "Public Enquiries Phone": "Public Enquiries Phone",
+    "Public Enquiries Email": "Public Enquiries Email",
+    "Head Office Physical Address": "Address",
+}
+# Keys no API column answers and that only the LLM fill can supply; left null unless asked for
+OPTIONAL_FIELDS = {"Chief Executive Title"}
+DIGIT_FIELDS = {"ABN", "ACN", "Chief Executive Phone", "Registration Enquiries Phone", "Public Enquiries Phone"}
+
+# Same field order as rto_scrape.RTO_Model (kept here so the API-only path needs no crawl4ai)
+MODEL_KEYS = [
+    "Code", "Legal Name", "Business Name", "Status", "ABN", "ACN", "RTO Type", "Web Address",
+    "Registration Manager", "Initial Registration Date", "Start Date", "End Date", "Legal Authority",
+    "Chief Executive Contact Name", "Chief Executive Title", "Chief Executive Phone", "Chief Executive Email",
+    "Registration Enquiries Contact Name", "Registration Enquiries Title", "Registration Enquiries Phone",
+    "Registration Enquiries Email", "Public Enquiries Contact Name", "Public Enquiries Title",
+    "Public Enquiries Phone", "Public Enquiries Email", "Address", "Qualifications", "Courses",
+]
+
+
+# ------------------------
+# API → RTO_Model
+# ------------------------
+def _clean(value, digits=False):
+    if value is None or value != value:   # None, NaN or NaT
+        return None
+    if isinstance(value, datetime):
+        return value.strftime("%d/%b/%Y")   # parsed export date -> the page format RTO_Model uses
+    value = str(value).strip()
+    if digits:
+        value = re.sub(r"\D", "", value)
+    return value or None
+
+
+def export_record(row):
+    """
+    One export row (dict keyed by the export's own column names) -> partial RTO_Model record.
+    A blank export cell is a real "none registered" (""); None means the export has no
+    such column, and is what the LLM fill looks for.
+    """
+    record = {key: None for key in MODEL_KEYS}
+    for column, key in EXPORT_TO_MODEL.items():
+        if column in row:
+            record[key] = _clean(row[column], digits=key in DIGIT_FIELDS) or ""
+    if not record["Chief Executive Phone"] and _clean(row.get("CEO Mobile")):
+        record["Chief Executive Phone"] = _clean(row["CEO Mobile"], digits=True)
+    if record["Code"]:
+        record["Code"] = record["Code"].zfill(4)
+    return record
+
+
+def missing_fields(record, optional=()):
+    """
+    Record keys the APIs had no answer for (None; blank export cells don't count).
+    OPTIONAL_FIELDS only count when named in optional.
+    """
+    return [key for key in MODEL_KEYS
+            if record.get(key) is None and (key not in OPTIONAL_FIELDS or key in optional)]
+
+
+async def fetch_scope_entries(client, code, semaphore, limiter, attempts=SCOPE_FETCH_ATTEMPTS):
+    """
+    (qualifications, courses) for one RTO from the combined scope listing. The listing is
+    re-read up to `attempts` times; raises ScopeFetchError when every attempt fails.
+    """
+    for attempt in range(attempts):
+        try:
+            items = [item async for item in
+                     iter_scope_items_async(client, SCOPE_API_TEMPLATE.format(code=code), semaphore, limiter)]
+            break
+        except ScopeFetchError as e:
+            print(f"[WARN] Scope fetch failed for {code} (attempt {attempt + 1}/{attempts}): {e}")
+            if attempt == attempts - 1:
+                raise
+    qualifications, courses = split_components(items)
+    return [item.to_record() for item in qualifications], [item.to_record() for item in courses]
+
+
+# ------------------------
+# LLM FILL FOR RESIDUAL FIELDS
+# ------------------------
+class ResidualFiller:
+    """
+    Crawls only the sections that hold an RTO's missing fields and asks the LLM for just
+    those keys (one strategy per distinct set of missing keys). Extractions go through
+    rto_scrape's extraction cache like every other LLM call.
+    """
+    def __init__(self, page_concurrency, llm_concurrency):
+        # crawl4ai / LLM stack, only needed when something is left to fill
+        import rto_scrape
+        from compaction import json_key
+        self.rto_scrape = rto_scrape
+        self.field_names = {json_key(name): name for name in rto_scrape.RTO_Model.model_fields}
+        self.pool = rto_scrape.CrawlerPool(size=page_concurrency)
+        self.scheduler = rto_scrape.get_llm_scheduler(initial_concurrency=llm_concurrency)
+        self._strategies = {}
+        self.calls = 0
+        self.filled = 0
+
+    async def __aenter__(self):
+        await self.pool.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.pool.__aexit__(*exc)
+
+    def _section_of(self, key):
+        description = self.rto_scrape.RTO_Model.model_fields[self.field_names[key]].description or ""
+        found = re.search(r"found in (\w+) section", description, re.I)
+        name = found.group(1).lower() if found else "summary"
+        return next((s for s in self.rto_scrape.RTO_SECTIONS if s.startswith(name[:4])), "summary")
+
+    def _strategy(self, keys):
+        from compaction import build_schema_prompt, compact_json_schema
+        rto_scrape = self.rto_scrape
+        keys = frozenset(keys)
+        if keys not in self._strategies:
+            exclude = [name for key, name in self.field_names.items() if key not in keys]
+            self._strategies[keys] = rto_scrape.LLMExtractionStrategy(
+                llm_config=rto_scrape.llm_cfg,
+                schema=compact_json_schema(rto_scrape.RTO_Model, exclude=exclude),
+                extraction_type="schema",
+                instruction=build_schema_prompt(rto_scrape.RTO_Model, rto_scrape.COMPACT_RULES[:4], exclude=exclude),
+                chunk_token_threshold=1000,
+                apply_chunking=False,
+                overlap_rate=0.0,
+                input_format="markdown",
+            )
+        return self._strategies[keys]
+
+    async def fill(self, record, keys):
+        rto_scrape = self.rto_scrape
+        keys = [key for key in keys if key in self.field_names]
+        if not keys:
+            return record
+        sections = sorted({self._section_of(key) for key in keys}, key=rto_scrape.RTO_SECTIONS.index)
+        urls = dict(zip(rto_scrape.RTO_SECTIONS, rto_scrape.rto_urls(record["Code"])))
+        crawled = await asyncio.gather(*(self.pool.arun(urls[s], config=rto_scrape.page_cfg) for s in sections))
+        if not all(result.success for result in crawled):
+            return record
+
+        by_section = dict(zip(sections, crawled))
+        results = [by_section.get(section) for section in rto_scrape.RTO_SECTIONS]
+        context = rto_scrape.build_rto_context(results, compact=True, sections=sections)
+        blocks = await rto_scrape.cached_aextract(self._strategy(keys), crawled[0].url, context)
+        self.calls += 1
+        extracted = rto_scrape.merge_extracted_blocks(blocks)
+        for key in keys:
+            if extracted.get(key) not in (None, ""):
+                record[key] = extracted[key]
+                self.filled += 1
+        return record
+
+
+# ------------------------
+# PIPELINE
+# ------------------------
+async def run_hybrid(codes=None, limit=None, output_path=HYBRID_OUTPUT_PATH, use_llm=True,
+                     concurrency=SCOPE_CONCURRENCY, rate_per_host=SCOPE_RATE_PER_HOST,
+                     page_concurrency=4, llm_concurrency=2, use_cache=True, offline=False,
+                     fill_ceo_title=False, errors_path=HYBRID_ERRORS_PATH):
+    """
+    Export row + scope listing -> RTO_Model record for every RTO, LLM only for leftovers.
+    Records are appended to output_path as JSON lines in completion order. An RTO whose
+    scope listing can't be fetched keeps null Qualifications/Courses (never LLM-filled)
+    and is logged to errors_path for a later re-run.
+    """
+    cache = open_http_cache(offline=offline) if use_cache else None
+    df_all, _ = get_all_rtos(cache=cache)
+    if df_all is None:
+        exit("❌ Could not fetch RTO list.")
+
+    rows = {}
+    for row in df_all.to_dict("records"):
+        record = export_record(row)
+        if record["Code"]:
+            rows[record["Code"]] = record
+    wanted = [code.zfill(4) for code in codes] if codes else list(rows)
+    wanted = [code for code in wanted if code in rows][:limit]
+
+    for path in (output_path, errors_path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = HostRateLimiter(rate_per_host)
+    optional = OPTIONAL_FIELDS if fill_ceo_title else set()
+    api_only = scope_failures = 0
+    total = len(wanted)
+    print(f"🎯 Building {total} RTO records from the APIs (LLM fill {'on' if use_llm else 'off'})...")
+
+    filler = ResidualFiller(page_concurrency, llm_concurrency) if use_llm else None
+    async with transport.make_async_client(max_connections=concurrency, max_keepalive=concurrency) as client:
+        if filler is not None:
+            await filler.__aenter__()
+        try:
+            async def build(code):
+                nonlocal api_only, scope_failures
+                record = dict(rows[code])
+                try:
+                    record["Qualifications"], record["Courses"] = await fetch_scope_entries(client, code, semaphore, limiter)
+                    residual = missing_fields(record, optional)
+                except ScopeFetchError as e:
+                    # An API error, not a gap: the scope tables are never worth an LLM call
+                    scope_failures += 1
+                    METRICS.inc("hybrid_scope_failures_total")
+                    errors.write(json.dumps({"Code": code, "error": f"{type(e).__name__}: {e}"}) + "\n")
+                    residual = [key for key in missing_fields(record, optional) if key not in ("Qualifications", "Courses")]
+                if not residual:
+                    api_only += 1
+                elif filler is not None:
+                    try:
+                        await filler.fill(record, residual)
+                    except Exception as e:
+                        print(f"[WARN] LLM fill failed for {code}: {e}")
+                return record
+
+            with open(output_path, "a", encoding="utf-8") as out, open(errors_path, "a", encoding="utf-8") as errors:
+                remaining = iter(wanted)
+                pending = {asyncio.ensure_future(build(code)) for _, code in zip(range(RTO_WINDOW), remaining)}
+                done = 0
+                while pending:
+                    finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in finished:
+                        record = task.result()
+                        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        done += 1
+                        print(f"[INFO] ({done}/{total}) {record['Code']}: "
+                              f"{len(record['Qualifications'] or [])} qualifications, {len(record['Courses'] or [])} courses")
+                        next_code = next(remaining, None)
+                        if next_code is not None:
+                            pending.add(asyncio.ensure_future(build(next_code)))
+        finally:
+            if filler is not None:
+                await filler.__aexit__(None, None, None)
+
+    print(f"[INFO] Connection reuse: {transport.STATS.summary()}")
+    if cache is not None:
+        print(f"[INFO] HTTP cache: {cache.summary()}")
+    if filler is not None:
+        print(f"[INFO] LLM fill: {filler.calls} calls, {filler.filled} fields filled")
+        print(f"[INFO] LLM scheduler: {filler.scheduler.summary()}")
+    if scope_failures:
+        print(f"[WARN] {scope_failures} RTOs without a scope listing → {errors_path}")
+    print(f"🎉 {total} records → {output_path} ({api_only} complete from the APIs alone)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RTO records from the APIs, LLM only for missing fields.")
+    parser.add_argument("--codes", nargs="*", help="only these RTO codes")
+    parser.add_argument("--limit", type=int, help="only the first N RTOs")
+    parser.add_argument("--output", default=HYBRID_OUTPUT_PATH)
+    parser.add_argument("--no-llm", action="store_true", help="API data only; leave missing fields null")
+    parser.add_argument("--fill-ceo-title", action="store_true", help="also LLM-fill Chief Executive Title")
+    parser.add_argument("--offline", action="store_true", help="replay the HTTP cache without the network")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the on-disk HTTP cache")
+    parser.add_argument("--concurrency", type=int, default=SCOPE_CONCURRENCY)
+    args = parser.parse_args()
+    asyncio.run(run_hybrid(args.codes, args.limit, args.output, use_llm=not args.no_llm,
+                           concurrency=args.concurrency, use_cache=not args.no_cache, offline=args.offline,
+                           fill_ceo_title=args.fill_ceo_title))
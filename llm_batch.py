@@ -0,0 +1,447 @@
+# llm_batch.py
+# Offline batch mode for rto_scrape.py: crawl every RTO, write one chat-completion request per RTO
+# to a JSONL file in the OpenAI-compatible Batch API format, submit it, poll it, and join the
+# results back by RTO code. `mock-server` runs a local stand-in for the batch endpoints.
+#
+#   python llm_batch.py mock-server &
+#   python llm_batch.py run --codes 0049 0115 --base-url http://127.0.0.1:8765/v1
+
+import os
+import re
+import json
+import time
+import uuid
+import email
+import asyncio
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+from crawl4ai.prompts import PROMPT_EXTRACT_SCHEMA_WITH_INSTRUCTION
+from crawl4ai.utils import escape_json_string, extract_xml_data, sanitize_html, split_and_parse_json_objects
+import rto_scrape
+from extraction_cache import strategy_key
+
+# ------------------------
+# CONFIG
+# ------------------------
+BATCH_DIR = os.path.join("data", "llm_batch")
+BATCH_BASE_URL = os.getenv("LLM_BATCH_BASE_URL", "https://api.openai.com/v1")
+BATCH_API_KEY = os.getenv("LLM_BATCH_API_KEY", "")
+BATCH_MODEL = os.getenv("LLM_BATCH_MODEL") or rto_scrape.llm_cfg.provider.split("/", 1)[-1]
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+POLL_INTERVAL = 30            # seconds between batch status checks
+BATCH_TIMEOUT = 60.0
+MOCK_PORT = 8765
+
+# Files inside a batch directory
+INPUT_FILE = "input.jsonl"        # one request line per RTO
+PARTIAL_FILE = "partial.jsonl"    # what we already know per RTO without the LLM (tables, links, cache hits)
+STATE_FILE = "state.json"         # uploaded file / batch ids and last known status
+OUTPUT_FILE = "output.jsonl"      # provider results
+ERROR_FILE = "errors.jsonl"       # provider per-request errors and crawl failures
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def _path(batch_dir, name):
+    return os.path.join(batch_dir, name)
+
+
+def _read_jsonl(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_state(batch_dir):
+    path = _path(batch_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(batch_dir, state):
+    tmp_path = _path(batch_dir, STATE_FILE) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, _path(batch_dir, STATE_FILE))
+
+
+# ------------------------
+# REQUEST FILE
+# ------------------------
+def build_prompt(strategy, url, content):
+    """The exact prompt LLMExtractionStrategy.aextract() would send for this content."""
+    variable_values = {
+        "URL": url,
+        "HTML": escape_json_string(sanitize_html(content)),
+        "REQUEST": strategy.instruction,
+        "SCHEMA": json.dumps(strategy.schema, indent=2),
+    }
+    prompt = PROMPT_EXTRACT_SCHEMA_WITH_INSTRUCTION
+    for variable, value in variable_values.items():
+        prompt = prompt.replace("{" + variable + "}", value)
+    return prompt
+
+
+def request_line(code, strategy, url, content, model=BATCH_MODEL):
+    return {
+        "custom_id": code,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": model,
+            "messages": [{"role": "user", "content": build_prompt(strategy, url, content)}],
+            "temperature": 0.01,
+        },
+    }
+
+
+async def prepare(codes, batch_dir=BATCH_DIR, page_concurrency=rto_scrape.PAGE_CONCURRENCY, model=BATCH_MODEL,
+                  force=False):
+    """
+    Crawl each RTO and write its extraction request to input.jsonl. Parsed tables, summary
+    links and extraction-cache hits go to partial.jsonl so join() can finish the record.
+    Refuses to overwrite a batch that was submitted but never joined (its partial.jsonl is
+    still needed) unless force=True.
+    """
+    state = load_state(batch_dir)
+    if (not force and state.get("batch_id") and not state.get("joined_into")
+            and state.get("status") not in TERMINAL_STATUSES - {"completed"}):
+        print(f"[WARN] Batch {state['batch_id']} in {batch_dir} is {state.get('status')} and not joined yet; "
+              "join it first or pass --force to prepare over it.")
+        return 0
+    os.makedirs(batch_dir, exist_ok=True)
+    cache = rto_scrape.get_extraction_cache()
+    queued = cached = failed = 0
+
+    async with rto_scrape.CrawlerPool(size=page_concurrency) as pool:
+        with open(_path(batch_dir, INPUT_FILE), "w", encoding="utf-8") as requests_out, \
+             open(_path(batch_dir, PARTIAL_FILE), "w", encoding="utf-8") as partial_out, \
+             open(_path(batch_dir, ERROR_FILE), "w", encoding="utf-8") as errors_out:
+
+            async def crawl(code):
+                try:
+                    results = await asyncio.gather(*(pool.arun(url, config=rto_scrape.page_cfg) for url in rto_scrape.rto_urls(code)))
+                    return code, results, None
+                except Exception as e:
+                    return code, None, f"{type(e).__name__}: {e}"
+
+            window = page_concurrency * 2
+            remaining = iter(codes)
+            pending = {asyncio.ensure_future(crawl(code)) for _, code in zip(range(window), remaining)}
+            while pending:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    code, results, error = task.result()
+                    broken = [r for r in results if not r.success] if results else []
+                    if error or broken:
+                        error = error or "; ".join(f"{r.url}: {r.error_message}" for r in broken)
+                        errors_out.write(json.dumps({"custom_id": code, "error": error}) + "\n")
+                        print(f"❌ {code}: {error}")
+                        failed += 1
+                    else:
+                        strategy, context, scope = rto_scrape.plan_rto_extraction(results)
+                        key = strategy_key(strategy, context)
+                        known = {section.title(): items for section, items in scope.items()}
+                        known.update({k: v for k, v in rto_scrape.parse_summary_links(results[0].html).items() if v})
+                        blocks = cache.get(key) if cache else None
+                        if blocks is None:
+                            requests_out.write(json.dumps(request_line(code, strategy, results[0].url, context, model),
+                                                          ensure_ascii=False) + "\n")
+                            queued += 1
+                        else:
+                            cached += 1
+                        partial_out.write(json.dumps({"Code": code, "cache_key": key, "known": known, "blocks": blocks},
+                                                     ensure_ascii=False) + "\n")
+                    next_code = next(remaining, None)
+                    if next_code is not None:
+                        pending.add(asyncio.ensure_future(crawl(next_code)))
+
+    save_state(batch_dir, {"status": "prepared", "requests": queued, "cached": cached, "crawl_failures": failed})
+    print(f"📝 Batch prepared in {batch_dir}: {queued} requests, {cached} from the extraction cache, {failed} crawl failures")
+    return queued
+
+
+# ------------------------
+# BATCH API CLIENT
+# ------------------------
+class BatchClient:
+    """Minimal OpenAI-compatible Files + Batches client."""
+    def __init__(self, base_url=BATCH_BASE_URL, api_key=BATCH_API_KEY, timeout=BATCH_TIMEOUT):
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.Client(base_url=base_url.rstrip("/"), headers=headers, timeout=timeout)
+
+    def close(self):
+        self.client.close()
+
+    def upload(self, path):
+        with open(path, "rb") as f:
+            r = self.client.post("/files", data={"purpose": "batch"},
+                                 files={"file": (os.path.basename(path), f, "application/jsonl")})
+        r.raise_for_status()
+        return r.json()["id"]
+
+    def create_batch(self, input_file_id, endpoint=BATCH_ENDPOINT, window=COMPLETION_WINDOW):
+        r = self.client.post("/batches", json={
+            "input_file_id": input_file_id, "endpoint": endpoint, "completion_window": window,
+        })
+        r.raise_for_status()
+        return r.json()
+
+    def get_batch(self, batch_id):
+        r = self.client.get(f"/batches/{batch_id}")
+        r.raise_for_status()
+        return r.json()
+
+    def download(self, file_id, path):
+        with self.client.stream("GET", f"/files/{file_id}/content") as r:
+            r.raise_for_status()
+            with open(path, "wb") as f:
+                for chunk in r.iter_bytes():
+                    f.write(chunk)
+
+
+def submit(batch_dir=BATCH_DIR, client=None):
+    state = load_state(batch_dir)
+    if state.get("batch_id") and state.get("status") not in TERMINAL_STATUSES:
+        print(f"[INFO] Batch {state['batch_id']} already submitted ({state['status']}).")
+        return state
+    if not state.get("requests"):
+        print("[INFO] Nothing to submit; every RTO was cached or failed to crawl.")
+        return state
+
+    client = client or BatchClient()
+    state["input_file_id"] = client.upload(_path(batch_dir, INPUT_FILE))
+    batch = client.create_batch(state["input_file_id"])
+    state.update({"batch_id": batch["id"], "status": batch.get("status", "validating"), "submitted": time.time()})
+    save_state(batch_dir, state)
+    print(f"🚀 Submitted batch {batch['id']} ({state['requests']} requests)")
+    return state
+
+
+def poll(batch_dir=BATCH_DIR, client=None, interval=POLL_INTERVAL, wait=True):
+    """Refresh the batch status; once it is terminal, download its output and error files."""
+    state = load_state(batch_dir)
+    if not state.get("batch_id"):
+        return state
+    client = client or BatchClient()
+    while True:
+        batch = client.get_batch(state["batch_id"])
+        state["status"] = batch.get("status")
+        state["request_counts"] = batch.get("request_counts")
+        save_state(batch_dir, state)
+        print(f"[INFO] Batch {state['batch_id']}: {state['status']} {state.get('request_counts') or ''}")
+        if state["status"] in TERMINAL_STATUSES or not wait:
+            break
+        time.sleep(interval)
+
+    if state["status"] in TERMINAL_STATUSES:
+        if batch.get("output_file_id"):
+            client.download(batch["output_file_id"], _path(batch_dir, OUTPUT_FILE))
+        if batch.get("error_file_id"):
+            client.download(batch["error_file_id"], _path(batch_dir, ERROR_FILE) + ".provider")
+    return state
+
+
+# ------------------------
+# JOIN
+# ------------------------
+def parse_completion(content):
+    """Blocks out of a completion, parsed the way LLMExtractionStrategy parses them."""
+    try:
+        blocks = json.loads(extract_xml_data(["blocks"], content)["blocks"])
+        return blocks if isinstance(blocks, list) else [blocks]
+    except Exception:
+        parsed, unparsed = split_and_parse_json_objects(content or "")
+        if unparsed:
+            parsed.append({"index": 0, "error": True, "tags": ["error"], "content": unparsed})
+        return parsed
+
+
+def join(batch_dir=BATCH_DIR, output_path=rto_scrape.BATCH_OUTPUT_PATH):
+    """
+    Merge provider results with partial.jsonl by RTO code and append finished records to
+    output_path (the same JSONL run_batch writes). Successful blocks go into the extraction cache.
+    A batch is joined into a given output once; codes already in output_path are skipped,
+    so a join interrupted half way can simply be re-run.
+    """
+    state = load_state(batch_dir)
+    if state.get("requests") and state.get("status") != "completed":
+        print(f"[INFO] Batch not completed yet ({state.get('status')}); nothing joined.")
+        return 0
+    joined_into = state.get("joined_into", [])
+    if os.path.abspath(output_path) in joined_into:
+        print(f"[INFO] Batch {state.get('batch_id') or batch_dir} already joined into {output_path}.")
+        return 0
+
+    cache = rto_scrape.get_extraction_cache()
+    results = {}
+    for line in _read_jsonl(_path(batch_dir, OUTPUT_FILE)):
+        response = line.get("response") or {}
+        if line.get("error") or response.get("status_code") != 200:
+            continue
+        content = response["body"]["choices"][0]["message"]["content"]
+        results[line["custom_id"]] = parse_completion(content)
+
+    done = rto_scrape.load_done_codes(output_path)
+    written = missing = skipped = 0
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "a", encoding="utf-8") as out:
+        for partial in _read_jsonl(_path(batch_dir, PARTIAL_FILE)):
+            code = partial["Code"]
+            if code in done:
+                skipped += 1
+                continue
+            blocks = partial.get("blocks") or results.get(code)
+            if not blocks:
+                missing += 1
+                continue
+            if cache and partial.get("blocks") is None and not any(b.get("error") for b in blocks):
+                cache.put(partial["cache_key"], blocks, code)
+            record = rto_scrape.merge_extracted_blocks(blocks)
+            record.update(partial["known"])
+            record["Code"] = record.get("Code") or code
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            written += 1
+    state["joined_into"] = joined_into + [os.path.abspath(output_path)]
+    save_state(batch_dir, state)
+    print(f"🎉 Joined {written} records → {output_path} ({missing} without a result, {skipped} already there)")
+    return written
+
+
+# ------------------------
+# MOCK BATCH ENDPOINT
+# ------------------------
+def mock_completion(body, custom_id):
+    """Schema-shaped reply: every key null except Code, so joins can be checked end to end."""
+    prompt = body["messages"][-1]["content"]
+    schema_text = re.search(r"<schema_block>\s*(.*?)\s*</schema_block>", prompt, re.S)
+    keys = list(json.loads(schema_text.group(1)).get("properties", {})) if schema_text else []
+    record = {key: None for key in keys}
+    record["Code"] = custom_id
+    return f"<blocks>{json.dumps([record])}</blocks>"
+
+
+class MockBatchHandler(BaseHTTPRequestHandler):
+    """In-memory stand-in for /v1/files and /v1/batches; batches complete on their second poll."""
+    files = {}
+    batches = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload, status=200, raw=None):
+        body = raw if raw is not None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json" if raw is None else "application/jsonl")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        if self.path.endswith("/files"):
+            message = email.message_from_bytes(
+                b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + self._body())
+            content = next((part.get_payload(decode=True) for part in message.walk()
+                            if part.get_filename()), b"")
+            file_id = f"file-{uuid.uuid4().hex[:12]}"
+            with self.lock:
+                self.files[file_id] = content
+            return self._send({"id": file_id, "object": "file", "bytes": len(content), "purpose": "batch"})
+
+        if self.path.endswith("/batches"):
+            request = json.loads(self._body())
+            batch_id = f"batch-{uuid.uuid4().hex[:12]}"
+            with self.lock:
+                if request.get("input_file_id") not in self.files:
+                    return self._send({"error": {"message": "unknown input_file_id"}}, status=400)
+                self.batches[batch_id] = {"id": batch_id, "object": "batch", "status": "validating",
+                                          "input_file_id": request["input_file_id"], "polls": 0}
+            return self._send(self.batches[batch_id])
+        self._send({"error": {"message": "not found"}}, status=404)
+
+    def do_GET(self):
+        match = re.search(r"/batches/([\w-]+)$", self.path)
+        if match:
+            with self.lock:
+                batch = self.batches.get(match.group(1))
+                if batch is None:
+                    return self._send({"error": {"message": "not found"}}, status=404)
+                batch["polls"] += 1
+                if batch["polls"] == 1:
+                    batch["status"] = "in_progress"
+                elif batch["status"] != "completed":
+                    self._complete(batch)
+            return self._send({k: v for k, v in batch.items() if k != "polls"})
+
+        match = re.search(r"/files/([\w-]+)/content$", self.path)
+        if match and match.group(1) in self.files:
+            return self._send(None, raw=self.files[match.group(1)])
+        self._send({"error": {"message": "not found"}}, status=404)
+
+    def _complete(self, batch):
+        lines = []
+        requests = [json.loads(line) for line in self.files[batch["input_file_id"]].splitlines() if line.strip()]
+        for request in requests:
+            lines.append(json.dumps({
+                "id": f"req-{uuid.uuid4().hex[:8]}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": {"choices": [{"index": 0, "message": {
+                    "role": "assistant", "content": mock_completion(request["body"], request["custom_id"])}}]}},
+                "error": None,
+            }))
+        output_id = f"file-{uuid.uuid4().hex[:12]}"
+        self.files[output_id] = ("\n".join(lines) + "\n").encode("utf-8")
+        batch.update({"status": "completed", "output_file_id": output_id,
+                      "request_counts": {"total": len(requests), "completed": len(requests), "failed": 0}})
+
+
+def serve_mock(port=MOCK_PORT):
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockBatchHandler)
+    print(f"🧪 Mock batch API on http://127.0.0.1:{port}/v1")
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline batch-API extraction for the RTO register.")
+    parser.add_argument("command", choices=["prepare", "submit", "poll", "join", "run", "mock-server"])
+    parser.add_argument("--codes-csv", default=rto_scrape.RTO_CODES_CSV)
+    parser.add_argument("--codes", nargs="*", help="explicit RTO codes (overrides --codes-csv)")
+    parser.add_argument("--limit", type=int, help="only the first N codes")
+    parser.add_argument("--batch-dir", default=BATCH_DIR)
+    parser.add_argument("--base-url", default=BATCH_BASE_URL)
+    parser.add_argument("--model", default=BATCH_MODEL)
+    parser.add_argument("--output", default=rto_scrape.BATCH_OUTPUT_PATH)
+    parser.add_argument("--page-concurrency", type=int, default=rto_scrape.PAGE_CONCURRENCY)
+    parser.add_argument("--poll-interval", type=int, default=POLL_INTERVAL)
+    parser.add_argument("--no-wait", action="store_true", help="poll once instead of waiting for completion")
+    parser.add_argument("--port", type=int, default=MOCK_PORT)
+    parser.add_argument("--force", action="store_true", help="prepare over a submitted batch that was never joined")
+    args = parser.parse_args()
+
+    if args.command == "mock-server":
+        serve_mock(args.port).serve_forever()
+    else:
+        client = BatchClient(args.base_url)
+        if args.command in ("prepare", "run"):
+            if args.codes:
+                codes = [c.zfill(4) for c in args.codes][:args.limit]   # --limit applies to explicit codes too
+            else:
+                codes = rto_scrape.load_rto_codes(args.codes_csv, args.limit)
+            asyncio.run(prepare(codes, args.batch_dir, args.page_concurrency, args.model, force=args.force))
+        if args.command in ("submit", "run"):
+            submit(args.batch_dir, client)
+        if args.command in ("poll", "run"):
+            poll(args.batch_dir, client, args.poll_interval, wait=not args.no_wait)
+        if args.command in ("join", "run"):
+            join(args.batch_dir, args.output)
+        client.close()
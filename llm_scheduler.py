@@ -0,0 +1,253 @@
+# llm_scheduler.py
+# Scheduler for LLMExtractionStrategy calls: per-provider requests/tokens-per-minute budgets,
+# jittered exponential backoff on 429/5xx, AIMD adaptive concurrency and failover between providers.
+
+import re
+import copy
+import time
+import random
+import asyncio
+from compaction import count_tokens
+from metrics import METRICS
+
+# ------------------------
+# CONFIG
+# ------------------------
+MAX_ATTEMPTS = 6              # tries per extraction across all providers
+BACKOFF_BASE = 2.0            # seconds; attempt n waits uniform(0, min(BACKOFF_CAP, BASE * 2**n))
+BACKOFF_CAP = 60.0
+OUTPUT_TOKEN_ESTIMATE = 2000  # completion tokens reserved per call against the TPM budget
+
+_THROTTLED = re.compile(r"\b429\b|rate.?limit|too many requests|quota|resource.?exhausted", re.I)
+_TRANSIENT = re.compile(
+    r"\b50[0234]\b|timeout|timed out|service.?unavailable|internal.?server|overloaded|"
+    r"api.?connection|connection (reset|error|refused)|bad gateway",
+    re.I,
+)
+
+
+def classify_blocks(blocks):
+    """'ok', 'throttled', 'transient' or 'failed' for the blocks an aextract() call returned."""
+    errors = [str(block.get("content", "")) for block in blocks or [] if block.get("error")]
+    if blocks and not errors:
+        return "ok"
+    message = " ".join(errors)
+    if _THROTTLED.search(message):
+        return "throttled"
+    if not blocks or _TRANSIENT.search(message):
+        return "transient"
+    return "failed"
+
+
+# ------------------------
+# LIMITERS
+# ------------------------
+class TokenBucket:
+    """
+    Budget of `per_minute` units refilled continuously; acquire(n) waits until n are available.
+    A request larger than the whole bucket is clamped so it can still go through.
+    """
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, n=1):
+        n = min(float(n), self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                await asyncio.sleep((n - self.tokens) / self.rate)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on in-flight calls: +1 slot per `limit` successes, halved on throttling.
+    """
+    def __init__(self, initial=2, minimum=1, maximum=16):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, outcome):
+        async with self._cond:
+            self.in_flight -= 1
+            if outcome == "ok":
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            elif outcome == "throttled":
+                self.limit = max(self.minimum, self.limit / 2)
+            self._cond.notify_all()
+
+
+# ------------------------
+# PROVIDERS
+# ------------------------
+class Provider:
+    """One LLMConfig with its own budgets and cool-down state."""
+    def __init__(self, llm_config, rpm=60, tpm=100_000, name=None):
+        self.llm_config = llm_config
+        self.name = name or llm_config.provider
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.cooldown_until = 0.0
+        self.calls = 0
+        self.failures = 0
+        # The scheduler owns retries; one attempt per call inside crawl4ai/litellm
+        self.llm_config.backoff_max_attempts = 1
+
+    def available(self, now):
+        return now >= self.cooldown_until
+
+
+class LLMScheduler:
+    """
+    Runs strategy.aextract() through the first available provider (in priority order),
+    within that provider's RPM/TPM budgets and a shared AIMD concurrency limit. Throttled or
+    transient failures cool the provider down and retry with jittered backoff, failing over
+    to the next provider when there is one.
+    """
+    def __init__(self, providers, initial_concurrency=2, max_concurrency=8,
+                 max_attempts=MAX_ATTEMPTS, output_tokens=OUTPUT_TOKEN_ESTIMATE):
+        if not providers:
+            raise ValueError("LLMScheduler needs at least one provider")
+        self.providers = list(providers)
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, 1, max_concurrency)
+        self.max_attempts = max_attempts
+        self.output_tokens = output_tokens
+        self.calls = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failovers = 0
+        self.failed = 0
+
+    @staticmethod
+    def _call_strategy(strategy, provider):
+        """
+        Per-call copy of the strategy on provider's LLMConfig with empty usage counters, so
+        one call's tokens can be read exactly even with other calls in flight.
+        """
+        call = copy.copy(strategy)
+        call.llm_config = provider.llm_config
+        call.usages = []
+        call.total_usage = type(strategy.total_usage)()
+        return call
+
+    @staticmethod
+    def _fold_usage(strategy, call, provider):
+        """Add one call's token usage back onto the strategy (for show_usage) and into the metrics."""
+        strategy.usages.extend(call.usages)
+        for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            setattr(strategy.total_usage, field, getattr(strategy.total_usage, field) + getattr(call.total_usage, field))
+        prompt, completion = call.total_usage.prompt_tokens, call.total_usage.completion_tokens
+        METRICS.inc("llm_prompt_tokens_total", prompt, provider=provider.name)
+        METRICS.inc("llm_completion_tokens_total", completion, provider=provider.name)
+        METRICS.add_to_tally(llm_calls=1, prompt_tokens=prompt, completion_tokens=completion)
+
+    async def _pick_provider(self, previous=None):
+        while True:
+            now = time.monotonic()
+            ready = [p for p in self.providers if p.available(now)]
+            if ready:
+                provider = ready[0]
+                if previous is not None and provider is not previous:
+                    self.failovers += 1
+                return provider
+            await asyncio.sleep(min(p.cooldown_until for p in self.providers) - now)
+
+    def estimate_tokens(self, strategy, content):
+        return (count_tokens(strategy.instruction or "") + count_tokens(str(strategy.schema or ""))
+                + count_tokens(content) + self.output_tokens)
+
+    async def extract(self, strategy, url, content, ix=0):
+        """Scheduled strategy.aextract(url, ix, content); returns the last blocks if every attempt fails."""
+        blocks, _ = await self.extract_with_provider(strategy, url, content, ix)
+        return blocks
+
+    async def extract_with_provider(self, strategy, url, content, ix=0):
+        """extract(), plus the Provider that produced the blocks (None if no call was made)."""
+        self.calls += 1
+        tokens = self.estimate_tokens(strategy, content)
+        provider = None
+        blocks = []
+        for attempt in range(self.max_attempts):
+            # Take a slot first so the provider is picked with current cool-down state
+            await self.concurrency.acquire()
+            outcome = "failed"
+            try:
+                provider = await self._pick_provider(previous=provider)
+                await provider.requests.acquire(1)
+                await provider.tokens.acquire(tokens)
+                provider.calls += 1
+                call = self._call_strategy(strategy, provider)
+                started = time.perf_counter()
+                try:
+                    blocks = await call.aextract(url, ix, content)
+                finally:
+                    self._fold_usage(strategy, call, provider)
+                outcome = classify_blocks(blocks)
+                METRICS.observe("llm_request_seconds", time.perf_counter() - started,
+                                provider=provider.name, outcome=outcome)
+                METRICS.inc("llm_requests_total", provider=provider.name, outcome=outcome)
+            finally:
+                await self.concurrency.release(outcome)
+
+            if outcome in ("ok", "failed"):
+                if outcome == "failed":
+                    self.failed += 1
+                return blocks, provider
+
+            provider.failures += 1
+            delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+            if outcome == "throttled":
+                self.throttled += 1
+                delay = max(delay, BACKOFF_BASE)
+            # Cool the failed provider down (transient errors too), so the next pick is another
+            # provider when one is free instead of the same primary again
+            provider.cooldown_until = max(provider.cooldown_until, time.monotonic() + delay)
+            if attempt == self.max_attempts - 1:
+                break
+            self.retries += 1
+            # Fail over straight away when the next pick is a different provider; otherwise back off
+            now = time.monotonic()
+            ready = [p for p in self.providers if p.available(now)]
+            if ready and ready[0] is not provider:
+                delay = 0.0
+            print(f"[WARN] LLM {outcome} on {provider.name} for {url} "
+                  f"(attempt {attempt + 1}/{self.max_attempts}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        self.failed += 1
+        return blocks, provider
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failovers": self.failovers,
+            "failed": self.failed,
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "providers": {p.name: {"calls": p.calls, "failures": p.failures} for p in self.providers},
+        }
+
+    def summary(self):
+        per_provider = ", ".join(f"{p.name}={p.calls}" for p in self.providers)
+        return (f"{self.calls} LLM calls ({per_provider}), {self.retries} retries, {self.throttled} throttled, "
+                f"{self.failovers} failovers, {self.failed} failed; concurrency limit {self.concurrency.limit:.1f}")
@@ -0,0 +1,82 @@
+# lru_store.py
+# Size-bounded SQLite table with least-recently-used eviction, shared by the HTTP response cache
+# (http_cache.py) and the LLM extraction cache (extraction_cache.py).
+
+import os
+import time
+import sqlite3
+import threading
+
+
+class LRUStore:
+    """
+    One `key TEXT PRIMARY KEY` table plus the caller's `columns` ("name TYPE" strings), with
+    last_access/size bookkeeping. Rows are LRU-evicted once their sizes pass max_bytes; the
+    running total is read once on open and kept up to date on put and delete.
+    Safe to share across threads and event loops (one connection behind a lock).
+    """
+    EVICT_BATCH = 64
+
+    def __init__(self, path, table, columns, max_bytes):
+        self.path = path
+        self.table = table
+        self.max_bytes = max_bytes
+        self.evictions = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, {', '.join(columns)}, "
+            "last_access REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_lru ON {table} (last_access)")
+        self.total = self._db.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+
+    def get(self, key, fields):
+        """The row's `fields` as a tuple (marking it recently used), or None."""
+        with self.lock:
+            row = self._db.execute(f"SELECT {', '.join(fields)} FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._db.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (time.time(), key))
+        return row
+
+    def put(self, key, size, **values):
+        """Insert or replace a row of `size` bytes, then evict down to max_bytes."""
+        names = ["key", *values, "last_access", "size"]
+        with self.lock:
+            old = self._db.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {self.table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                (key, *values.values(), time.time(), size),
+            )
+            self.total += size - (old[0] if old else 0)
+            self._evict()
+
+    def update(self, key, **values):
+        """Set columns on an existing row (and mark it recently used)."""
+        assignments = ", ".join(f"{name} = ?" for name in values)
+        with self.lock:
+            self._db.execute(f"UPDATE {self.table} SET {assignments}, last_access = ? WHERE key = ?",
+                             (*values.values(), time.time(), key))
+
+    def _evict(self):
+        while self.total > self.max_bytes:
+            oldest = self._db.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY last_access LIMIT ?", (self.EVICT_BATCH,)
+            ).fetchall()
+            if not oldest:
+                break
+            for key, size in oldest:
+                if self.total <= self.max_bytes:
+                    break
+                self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self.total -= size
+                self.evictions += 1
+
+    def close(self):
+        with self.lock:
+            self._db.close()
@@ -0,0 +1,206 @@
+# metrics.py
+# Process-wide run metrics for the scrapers: counters, latency/size histograms and per-stage
+# timings, written out as a JSON run report and, optionally, in the Prometheus text format
+# (for node_exporter's textfile collector), so nightly throughput can be tracked run over run.
+
+import os
+import json
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# ------------------------
+# CONFIG
+# ------------------------
+NAMESPACE = "rto"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900)
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+
+_tally = contextvars.ContextVar("metrics_tally", default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus style) with count, sum and max."""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (the observed max for the +Inf bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (self.max,), self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": round(self.max, 6),
+        }
+
+
+class Metrics:
+    """
+    Thread-safe registry of labelled counters and histograms. Names follow Prometheus
+    conventions (`_total`, `_seconds`, `_bytes`); the NAMESPACE prefix is added on export.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the wall time of the block into histogram `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def stage(self, stage):
+        """Time one pipeline stage (export, transform, scope fetch, ...)."""
+        return self.timer("stage_seconds", stage=stage)
+
+    # Per-unit totals (e.g. tokens for one RTO) gathered from everything a block awaits
+    @contextmanager
+    def tally(self):
+        """
+        Collect add_to_tally() amounts made inside the block, including tasks it starts,
+        into the yielded dict. Each asyncio task gets its own tally, so concurrent RTOs
+        don't mix.
+        """
+        totals = {}
+        token = _tally.set(totals)
+        try:
+            yield totals
+        finally:
+            _tally.reset(token)
+
+    @staticmethod
+    def add_to_tally(**amounts):
+        totals = _tally.get()
+        if totals is not None:
+            for key, value in amounts.items():
+                totals[key] = totals.get(key, 0) + value
+
+    # ------------------------
+    # EXPORT
+    # ------------------------
+    @staticmethod
+    def _series(name, labels):
+        return name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+
+    def report(self, extra=None):
+        """JSON-able run report: stage totals, counters, histogram summaries plus `extra`."""
+        with self._lock:
+            counters = {self._series(name, labels): value for (name, labels), value in sorted(self.counters.items())}
+            histograms = {self._series(name, labels): h.as_dict()
+                          for (name, labels), h in sorted(self.histograms.items())}
+            stages = {dict(labels)["stage"]: round(h.sum, 3)
+                      for (name, labels), h in self.histograms.items() if name == "stage_seconds"}
+        finished = time.time()
+        return {
+            "started_at": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="seconds"),
+            "finished_at": datetime.fromtimestamp(finished, timezone.utc).isoformat(timespec="seconds"),
+            "duration_seconds": round(finished - self.started, 3),
+            "stages": stages,
+            "counters": counters,
+            "histograms": histograms,
+            **({"extra": extra} if extra else {}),
+        }
+
+    def prometheus(self):
+        """Everything in the Prometheus text exposition format."""
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = f"{NAMESPACE}_{name}"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} counter")
+                    typed.add(metric)
+                lines.append(f"{metric}{label_text(labels)} {value}")
+            for (name, labels), h in sorted(self.histograms.items()):
+                metric = f"{NAMESPACE}_{name}"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} histogram")
+                    typed.add(metric)
+                cumulative = 0
+                for bound, n in zip(h.buckets, h.counts):
+                    cumulative += n
+                    lines.append(f"{metric}_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{metric}_bucket{label_text(labels, [('le', '+Inf')])} {h.count}")
+                lines.append(f"{metric}_sum{label_text(labels)} {h.sum}")
+                lines.append(f"{metric}_count{label_text(labels)} {h.count}")
+        lines.append(f"# TYPE {NAMESPACE}_run_duration_seconds gauge")
+        lines.append(f"{NAMESPACE}_run_duration_seconds {time.time() - self.started:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, report_path=None, prometheus_path=None, extra=None):
+        """Write the JSON report and/or the Prometheus textfile (each atomically)."""
+        outputs = []
+        if report_path:
+            outputs.append((report_path, json.dumps(self.report(extra), indent=2, ensure_ascii=False, default=str)))
+        if prometheus_path:
+            outputs.append((prometheus_path, self.prometheus()))
+        for path, text in outputs:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            print(f"📈 Metrics written: {path}")
+
+    def summary(self):
+        stages = self.report()["stages"]
+        return ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in stages.items()) or "no stages timed"
+
+
+METRICS = Metrics()
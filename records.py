@@ -0,0 +1,233 @@
+# records.py
+# Compact in-memory scope items shared by scraper.py, hybrid.py, rto_scrape.py and to_csv.py: one
+# slotted ScopeItem per qualification/course, the delivery flags packed into one int and the strings
+# that repeat across thousands of RTOs (codes, titles, labels, dates) interned.
+
+import re
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+
+# ------------------------
+# CONFIG
+# ------------------------
+# Scope item fields, in the order they are flattened into scraper.py's Qualifications/Courses cells
+SCOPE_ITEM_KEYS = [
+    "deliveryAct", "deliveryNsw", "deliveryNt", "deliveryQld", "deliverySa", "deliveryTas", "deliveryVic",
+    "deliveryWa", "isInternational", "code", "componentType", "componentTypeLabel", "endDate", "extent",
+    "extentLabel", "isImplicit", "nrtId", "startDate", "status", "statusLabel", "title",
+]
+
+# Boolean API fields -> bit in ScopeItem.flags; the first eight are the per-state delivery flags
+FLAG_KEYS = [
+    "deliveryAct", "deliveryNsw", "deliveryNt", "deliveryQld", "deliverySa", "deliveryTas", "deliveryVic",
+    "deliveryWa", "isInternational", "isImplicit",
+]
+FLAG_BITS = {key: 1 << i for i, key in enumerate(FLAG_KEYS)}
+
+# Delivery Notification order used by the RTO pages and the LLM records
+STATES = ["NSW", "VIC", "QLD", "SA", "WA", "TAS", "NT", "ACT"]
+INTERNATIONAL = "INTERNATIONAL"
+STATE_BITS = {state: FLAG_BITS[f"delivery{state.title()}"] for state in STATES}
+STATE_BITS[INTERNATIONAL] = FLAG_BITS["isInternational"]
+NATIONAL_MASK = sum(FLAG_BITS[key] for key in FLAG_KEYS[:8])
+
+# ScopeItem slot <- scope API key, for the string fields
+_TEXT_FIELDS = {
+    "code": "code", "title": "title", "component_type": "componentType",
+    "component_type_label": "componentTypeLabel", "status": "status", "status_label": "statusLabel",
+    "extent": "extent", "extent_label": "extentLabel", "start_date": "startDate", "end_date": "endDate",
+    "nrt_id": "nrtId",
+}
+_TEXT_VALUES = {"True": True, "False": False, "None": None}
+_API_TO_SLOT = {key: slot for slot, key in _TEXT_FIELDS.items()}
+# "[deliveryAct: {}, ..., title: {}]" filled positionally by ScopeItem.api_text
+_API_TEXT = "[" + ", ".join(f"{key}: {{}}" for key in SCOPE_ITEM_KEYS) + "]"
+_API_FIELDS = [(FLAG_BITS[key], None) if key in FLAG_BITS else (0, _API_TO_SLOT[key]) for key in SCOPE_ITEM_KEYS]
+# One "[k: v, ..., title: v]" group per item; title is last and may contain commas.
+_ITEM_RE = re.compile(
+    r"\[" + ", ".join(f"{re.escape(key)}: (.*?)" for key in SCOPE_ITEM_KEYS)
+    + r"\](?=, \[" + re.escape(SCOPE_ITEM_KEYS[0]) + r": |$)",
+    re.DOTALL,
+)
+_STATE_PATTERN = re.compile(r"\b(" + "|".join(STATES + [INTERNATIONAL]) + r")\b")
+
+
+def intern(value):
+    """sys.intern for strings; anything else (None, numbers) is returned unchanged."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def page_date(value):
+    """Scope API date ("2030-12-31T00:00:00") -> the RTO page format ("31/Dec/2030"); other text unchanged."""
+    value = value or ""
+    try:
+        return datetime.strptime(value[:10], "%Y-%m-%d").strftime("%d/%b/%Y")
+    except ValueError:
+        return value
+
+
+# ------------------------
+# DELIVERY FLAGS
+# ------------------------
+def delivery_mask(states):
+    """["NSW", "WA", "INTERNATIONAL"] -> bitmask; unknown entries are ignored."""
+    mask = 0
+    for state in states or ():
+        mask |= STATE_BITS.get(str(state).strip().upper(), 0)
+    return mask
+
+
+def parse_delivery_mask(text):
+    """Delivery cell text -> bitmask; 'NATIONAL' means every state."""
+    text = (text or "").upper()
+    mask = NATIONAL_MASK if re.search(r"\bNATIONAL\b", text) else 0
+    for state in _STATE_PATTERN.findall(text):
+        mask |= STATE_BITS[state]
+    return mask
+
+
+def delivery_states(mask):
+    """Bitmask -> state list in STATES order, plus INTERNATIONAL when that bit is set."""
+    states = [state for state in STATES if mask & STATE_BITS[state]]
+    if mask & STATE_BITS[INTERNATIONAL]:
+        states.append(INTERNATIONAL)
+    return states
+
+
+def parse_delivery(text):
+    """'NATIONAL' -> every state; otherwise the states mentioned in STATES order, then INTERNATIONAL."""
+    return delivery_states(parse_delivery_mask(text))
+
+
+# ------------------------
+# SCOPE ITEMS
+# ------------------------
+@dataclass(slots=True)
+class ScopeItem:
+    """
+    One qualification/course on an RTO's scope. `flags` holds the FLAG_KEYS booleans that
+    are True; `known` the ones the source gave as booleans and `nulls` the ones it gave as
+    null (rendered "None", like any other null); the rest render as blanks.
+    """
+    code: str = ""
+    title: str = ""
+    component_type: str = ""
+    component_type_label: str = ""
+    status: str = ""
+    status_label: str = ""
+    extent: str = ""
+    extent_label: str = ""
+    start_date: str = ""
+    end_date: str = ""
+    nrt_id: str = ""
+    flags: int = 0
+    known: int = 0
+    nulls: int = 0
+
+    @classmethod
+    def from_api(cls, item):
+        """Raw scope API item -> ScopeItem. Missing fields stay "", nulls stay None."""
+        flags = known = nulls = 0
+        for key, bit in FLAG_BITS.items():
+            value = item.get(key, "")
+            if isinstance(value, bool):
+                known |= bit
+                if value:
+                    flags |= bit
+            elif value is None:
+                nulls |= bit
+        return cls(**{slot: intern(item.get(key, "")) for slot, key in _TEXT_FIELDS.items()},
+                   flags=flags, known=known, nulls=nulls)
+
+    @classmethod
+    def from_cell_fields(cls, fields):
+        """One parse_scope_cell() dict (all values text; nulls were written as "None") -> ScopeItem."""
+        return cls.from_api({key: _TEXT_VALUES.get(value, value) for key, value in fields.items()})
+
+    @classmethod
+    def from_record(cls, entry):
+        """Title Case Qualifications/Courses entry (RTO pages / LLM) -> ScopeItem."""
+        known = NATIONAL_MASK | STATE_BITS[INTERNATIONAL] if "Delivery Notification" in entry else 0
+        return cls(
+            code=intern(entry.get("Code") or ""),
+            title=intern(entry.get("Title") or ""),
+            status=intern(entry.get("Status") or ""),
+            start_date=intern(entry.get("Start Date") or ""),
+            end_date=intern(entry.get("End Date") or ""),
+            flags=delivery_mask(entry.get("Delivery Notification")),
+            known=known,
+        )
+
+    def flag(self, key):
+        """True/False for a FLAG_KEYS field, None when the source didn't give it."""
+        bit = FLAG_BITS[key]
+        return bool(self.flags & bit) if self.known & bit else None
+
+    @property
+    def delivery(self):
+        return delivery_states(self.flags)
+
+    def api_text(self):
+        """The "[deliveryAct: True, ..., title: ...]" fragment scraper.py writes into its cells."""
+        flags, known, nulls = self.flags, self.known, self.nulls
+        return _API_TEXT.format(*[
+            getattr(self, slot) if slot
+            else ("True" if flags & bit else "False") if known & bit
+            else "None" if nulls & bit else ""
+            for bit, slot in _API_FIELDS
+        ])
+
+    def to_record(self):
+        """Title Case entry in the shape RTO_Model's Qualifications/Courses use."""
+        return {
+            "Code": self.code or "",
+            "Title": self.title or "",
+            "Status": self.status_label or self.status or "",
+            "Start Date": page_date(self.start_date),
+            "End Date": page_date(self.end_date),
+            "Delivery Notification": self.delivery,
+        }
+
+    def summary_line(self):
+        """One to_csv.py cell line: "Code: .., Title: .., Status: .., Start Date: .., End Date: .."."""
+        return (f"Code: {self.code}, Title: {self.title}, Status: {self.status_label or self.status}, "
+                f"Start Date: {page_date(self.start_date)}, End Date: {page_date(self.end_date)}")
+
+
+def split_components(items):
+    """
+    Split raw scope API items by componentType into (qualifications, courses) ScopeItem lists.
+    Relative order is kept, so the server's code sort survives.
+    """
+    qualifications, courses = [], []
+    for item in items:
+        component_type = item.get("componentType")
+        if component_type == "qualification":
+            qualifications.append(ScopeItem.from_api(item))
+        elif component_type == "accreditedCourse":
+            courses.append(ScopeItem.from_api(item))
+    return qualifications, courses
+
+
+def parse_scope_cell(cell):
+    """
+    Parse a flattened Qualifications/Courses cell back into a list of {key: str} dicts.
+    """
+    if not cell:
+        return []
+    return [dict(zip(SCOPE_ITEM_KEYS, match.groups())) for match in _ITEM_RE.finditer(cell)]
+
+
+def format_scope_items(items):
+    """ScopeItems -> scraper.py's "[...], [...]" Qualifications/Courses cell."""
+    return ", ".join(item.api_text() for item in items or ())
+
+
+def summary_line(entry):
+    """to_csv.py cell line for a ScopeItem or a Title Case dict (missing keys show as N/A)."""
+    if isinstance(entry, ScopeItem):
+        return entry.summary_line()
+    get = entry.get
+    return (f"Code: {get('Code', 'N/A')}, Title: {get('Title', 'N/A')}, Status: {get('Status', 'N/A')}, "
+            f"Start Date: {get('Start Date', 'N/A')}, End Date: {get('End Date', 'N/A')}")
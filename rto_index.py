@@ -0,0 +1,369 @@
+# rto_index.py
+# Indexed SQLite store over the scraper output, so "which RTOs deliver BSB50420 in QLD" is an index
+# lookup instead of a scan of the CSV and its stringified scope cells. Built from the scraper.py CSV
+# and/or the JSONL records of rto_scrape.py / hybrid.py; scope titles are full-text searchable (FTS5).
+#
+#   python rto_index.py build [--csv data/rto_with_qualifications_and_courses.csv] [--jsonl data/rto_hybrid.jsonl]
+#   python rto_index.py query --component BSB50420 --state QLD [--scope-status current]
+#   python rto_index.py query --abn 40009668553
+#   python rto_index.py show 0049
+
+import os
+import re
+import sys
+import csv
+import json
+import time
+import sqlite3
+from datetime import datetime
+from records import STATE_BITS, ScopeItem, delivery_states, parse_scope_cell
+
+# ------------------------
+# CONFIG
+# ------------------------
+INDEX_PATH = os.path.join("data", "rto_index.sqlite")
+CSV_SOURCE = os.path.join("data", "rto_with_qualifications_and_courses.csv")
+DEFAULT_LIMIT = 200           # matching RTOs returned by find() unless asked otherwise
+
+# Title Case record key -> rtos column (both the scraper CSV and the JSONL records use these keys)
+RTO_COLUMNS = {
+    "Code": "code",
+    "Legal Name": "legal_name",
+    "Business Name": "business_name",
+    "Status": "status",
+    "ABN": "abn",
+    "ACN": "acn",
+    "RTO Type": "rto_type",
+    "Web Address": "web_address",
+}
+# Scope list key -> componentType, for records that carry Title Case lists instead of API items
+SCOPE_LISTS = {"Qualifications": "qualification", "Courses": "accreditedCourse"}
+
+SCHEMA = """
+CREATE TABLE rtos (
+    code TEXT PRIMARY KEY,
+    legal_name TEXT,
+    business_name TEXT,
+    status TEXT COLLATE NOCASE,
+    abn TEXT,
+    acn TEXT,
+    rto_type TEXT,
+    web_address TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX rtos_abn ON rtos (abn);
+CREATE INDEX rtos_status ON rtos (status);
+
+CREATE TABLE scope_items (
+    id INTEGER PRIMARY KEY,
+    rto_code TEXT NOT NULL,
+    component_type TEXT,
+    code TEXT COLLATE NOCASE,
+    title TEXT,
+    status TEXT COLLATE NOCASE,
+    start_date TEXT,
+    end_date TEXT,
+    flags INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX scope_items_code ON scope_items (code, rto_code);
+CREATE INDEX scope_items_rto ON scope_items (rto_code);
+CREATE INDEX scope_items_status ON scope_items (status);
+
+-- One row per (delivery state bit, scope item): the flags bitmask can't be B-tree indexed
+CREATE TABLE scope_states (
+    state INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    PRIMARY KEY (state, item_id)
+) WITHOUT ROWID;
+
+CREATE VIRTUAL TABLE scope_titles USING fts5 (title, content='scope_items', content_rowid='id');
+"""
+
+
+# ------------------------
+# VALUE CLEANUP
+# ------------------------
+def _code_key(code):
+    return str(code or "").strip().zfill(4)
+
+
+def _digits(value):
+    """ABN/ACN as digits only; the CSV may hold them as floats ("12862898150.0")."""
+    value = "" if value is None else str(value).strip()
+    if value.endswith(".0"):
+        value = value[:-2]
+    return re.sub(r"\D", "", value) or None
+
+
+def iso_date(value):
+    """Scope API ("2030-12-31T00:00:00"), page ("31/Dec/2030") or export ("5/11/2014") date -> "2030-12-31"."""
+    value = (value or "").strip()
+    for fmt, text in (("%Y-%m-%d", value[:10]), ("%d/%b/%Y", value), ("%d/%m/%Y", value)):
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return value or None
+
+
+def _scope_row(rto_code, component_type, item):
+    return (rto_code, item.component_type or component_type, item.code or None, item.title or None,
+            item.status_label or item.status or None, iso_date(item.start_date), iso_date(item.end_date),
+            item.flags)
+
+
+# ------------------------
+# SOURCES
+# ------------------------
+def iter_csv_records(csv_path=CSV_SOURCE):
+    """
+    (record, scope) per row of a scraper CSV, where scope is a list of (component_type, ScopeItem).
+    """
+    csv.field_size_limit(sys.maxsize)
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            scope = []
+            for column, component_type in SCOPE_LISTS.items():
+                for fields in parse_scope_cell(row.pop(column, "")):
+                    scope.append((component_type, ScopeItem.from_cell_fields(fields)))
+            yield row, scope
+
+
+def iter_jsonl_records(jsonl_path):
+    """(record, scope) per RTO record in rto_scrape.py / hybrid.py / llm_batch.py output."""
+    from to_csv import iter_json_records   # streaming reader for JSONL or JSON arrays
+    for record in iter_json_records(jsonl_path):
+        if not isinstance(record, dict) or not record.get("Code"):
+            continue
+        scope = []
+        for key, component_type in SCOPE_LISTS.items():
+            for entry in record.pop(key, None) or []:
+                if isinstance(entry, dict):
+                    scope.append((component_type, ScopeItem.from_record(entry)))
+        yield record, scope
+
+
+# ------------------------
+# BUILD
+# ------------------------
+def build_index(csv_path=None, jsonl_paths=(), index_path=INDEX_PATH):
+    """
+    Rebuild the index from scratch into a temporary file and swap it into place. Sources are
+    loaded in order (CSV first, then each JSONL); a later source replaces an earlier RTO.
+    """
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    tmp_path = f"{index_path}.building"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    sources = ([iter_csv_records(csv_path)] if csv_path else []) + [iter_jsonl_records(p) for p in jsonl_paths]
+    started = time.perf_counter()
+    db = sqlite3.connect(tmp_path, isolation_level=None)
+    try:
+        db.execute("PRAGMA journal_mode=OFF")
+        db.execute("PRAGMA synchronous=OFF")
+        db.executescript(SCHEMA)
+        db.execute("BEGIN")
+        insert_rto = f"INSERT OR REPLACE INTO rtos VALUES ({', '.join('?' * (len(RTO_COLUMNS) + 1))})"
+        for source in sources:
+            for record, scope in source:
+                code = _code_key(record.get("Code"))
+                values = {column: record.get(key) for key, column in RTO_COLUMNS.items()}
+                values.update(code=code, abn=_digits(values["abn"]), acn=_digits(values["acn"]))
+                db.execute(insert_rto, [values[column] or None for column in RTO_COLUMNS.values()]
+                           + [json.dumps(record, ensure_ascii=False)])
+                db.execute("DELETE FROM scope_items WHERE rto_code = ?", (code,))
+                db.executemany("INSERT INTO scope_items VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               [_scope_row(code, component_type, item) for component_type, item in scope])
+        for bit in STATE_BITS.values():
+            db.execute("INSERT INTO scope_states SELECT ?, id FROM scope_items WHERE flags & ? != 0", (bit, bit))
+        db.execute("INSERT INTO scope_titles (scope_titles) VALUES ('rebuild')")
+        db.execute("COMMIT")
+        db.execute("ANALYZE")
+        rtos = db.execute("SELECT COUNT(*) FROM rtos").fetchone()[0]
+        items = db.execute("SELECT COUNT(*) FROM scope_items").fetchone()[0]
+    finally:
+        db.close()
+    os.replace(tmp_path, index_path)
+    print(f"✅ Index saved: {index_path} ({rtos} RTOs, {items} scope items, "
+          f"{time.perf_counter() - started:.1f}s)")
+    return index_path
+
+
+# ------------------------
+# QUERIES
+# ------------------------
+def _fts_query(text):
+    """Free text -> an FTS5 query matching every word (as a prefix), with quoting made safe."""
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class RTOIndex:
+    """Read-only lookups over an index built by build_index()."""
+    def __init__(self, path=INDEX_PATH):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No index at {path}; run `python rto_index.py build` first")
+        self.path = path
+        self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self._db.row_factory = sqlite3.Row
+
+    def close(self):
+        self._db.close()
+
+    def rto(self, code):
+        """The stored summary record for one RTO code, or None."""
+        row = self._db.execute("SELECT record FROM rtos WHERE code = ?", (_code_key(code),)).fetchone()
+        return json.loads(row["record"]) if row else None
+
+    def scope(self, code, component_type=None):
+        """Every scope item of one RTO (optionally only "qualification" or "accreditedCourse")."""
+        sql = "SELECT * FROM scope_items WHERE rto_code = ?"
+        params = [_code_key(code)]
+        if component_type:
+            sql += " AND component_type = ?"
+            params.append(component_type)
+        return [self._item(row) for row in self._db.execute(sql + " ORDER BY component_type DESC, code", params)]
+
+    @staticmethod
+    def _item(row):
+        return {
+            "component_type": row["component_type"],
+            "code": row["code"],
+            "title": row["title"],
+            "status": row["status"],
+            "start_date": row["start_date"],
+            "end_date": row["end_date"],
+            "delivery": delivery_states(row["flags"]),
+        }
+
+    def find(self, code=None, abn=None, status=None, component=None, scope_status=None, state=None,
+             title=None, limit=DEFAULT_LIMIT):
+        """
+        RTOs matching every filter given. RTO filters: code, abn, status (registration status).
+        Scope filters: component (code), scope_status, state (NSW ... ACT or INTERNATIONAL) and
+        title (full-text words); when any is given each RTO lists the scope items that matched.
+        At most `limit` RTOs are returned, with all of their matching items.
+        """
+        where, params = [], []
+        if code:
+            where.append("r.code = ?")
+            params.append(_code_key(code))
+        if abn:
+            where.append("r.abn = ?")
+            params.append(_digits(abn))
+        if status:
+            where.append("r.status = ?")
+            params.append(status)
+
+        scoped = any((component, scope_status, state, title))
+        if scoped:
+            if component:
+                where.append("s.code = ?")
+                params.append(component.strip())
+            if scope_status:
+                where.append("s.status = ?")
+                params.append(scope_status)
+            if state:
+                bit = STATE_BITS.get(state.strip().upper())
+                if bit is None:
+                    raise ValueError(f"Unknown state {state!r}; expected one of {sorted(STATE_BITS)}")
+                where.append("s.id IN (SELECT item_id FROM scope_states WHERE state = ?)")
+                params.append(bit)
+            if title:
+                where.append("s.id IN (SELECT rowid FROM scope_titles WHERE scope_titles MATCH ?)")
+                params.append(_fts_query(title))
+            # The limit picks the first `limit` matching RTO codes before the join fans out to items
+            matches = "FROM scope_items s JOIN rtos r ON r.code = s.rto_code WHERE " + " AND ".join(where)
+            sql = (f"SELECT r.code AS rto_code, r.legal_name, r.status AS rto_status, r.abn, s.* {matches} "
+                   f"AND r.code IN (SELECT DISTINCT r.code {matches} ORDER BY r.code LIMIT ?) ORDER BY r.code, s.code")
+            params = params + params + [limit]
+        else:
+            sql = "SELECT r.code AS rto_code, r.legal_name, r.status AS rto_status, r.abn FROM rtos r"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += " ORDER BY r.code LIMIT ?"
+            params.append(limit)
+
+        results = {}
+        for row in self._db.execute(sql, params):
+            rto = results.setdefault(row["rto_code"], {
+                "code": row["rto_code"],
+                "legal_name": row["legal_name"],
+                "status": row["rto_status"],
+                "abn": row["abn"],
+            })
+            if scoped:
+                rto.setdefault("items", []).append(self._item(row))
+        return list(results.values())
+
+    def stats(self):
+        return {
+            "rtos": self._db.execute("SELECT COUNT(*) FROM rtos").fetchone()[0],
+            "scope_items": self._db.execute("SELECT COUNT(*) FROM scope_items").fetchone()[0],
+        }
+
+
+# ------------------------
+# CLI
+# ------------------------
+def _print_results(results, as_json=False):
+    if as_json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    for rto in results:
+        print(f"{rto['code']}  {rto['legal_name'] or ''}  [{rto['status'] or ''}]  ABN {rto['abn'] or '-'}")
+        for item in rto.get("items", []):
+            states = ",".join(item["delivery"]) or "-"
+            print(f"    {item['code']}  {item['title'] or ''}  [{item['status'] or ''}]  "
+                  f"{item['start_date'] or ''} → {item['end_date'] or ''}  {states}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build and query a local SQLite index of scraped RTO data.")
+    parser.add_argument("--index", default=INDEX_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="(re)build the index from scraper output")
+    build.add_argument("--csv", help=f"scraper.py CSV (default {CSV_SOURCE} when no --jsonl is given)")
+    build.add_argument("--jsonl", nargs="*", default=[], help="rto_scrape.py / hybrid.py JSONL records")
+
+    query = commands.add_parser("query", help="find RTOs by code, ABN, status, component, state or title")
+    query.add_argument("--code")
+    query.add_argument("--abn")
+    query.add_argument("--status", help="RTO registration status, e.g. Current")
+    query.add_argument("--component", help="qualification / course code, e.g. BSB50420")
+    query.add_argument("--scope-status", help="status of the component on scope, e.g. Current")
+    query.add_argument("--state", help="delivery state: NSW VIC QLD SA WA TAS NT ACT or INTERNATIONAL")
+    query.add_argument("--title", help="words in the qualification / course title")
+    query.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    query.add_argument("--json", action="store_true")
+
+    show = commands.add_parser("show", help="one RTO's record and scope")
+    show.add_argument("code")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        csv_path = args.csv or (None if args.jsonl else CSV_SOURCE)
+        build_index(csv_path, args.jsonl, args.index)
+    else:
+        index = RTOIndex(args.index)
+        started = time.perf_counter()
+        if args.command == "query":
+            try:
+                results = index.find(code=args.code, abn=args.abn, status=args.status, component=args.component,
+                                     scope_status=args.scope_status, state=args.state, title=args.title,
+                                     limit=args.limit)
+            except ValueError as e:
+                exit(f"❌ {e}")
+            elapsed = time.perf_counter() - started
+            _print_results(results, args.json)
+            print(f"[INFO] {len(results)} RTOs in {elapsed * 1000:.1f} ms", file=sys.stderr)
+        else:
+            record = index.rto(args.code)
+            if record is None:
+                exit(f"❌ RTO {args.code} is not in {args.index}")
+            print(json.dumps({**record, "scope": index.scope(args.code)}, ensure_ascii=False, indent=2))
+        index.close()
@@ -4,7 +4,10 @@
 # pip install crawl4ai openai pydantic python-dotenv
 # playwright install
 
-import os, json, asyncio
+import os, re, csv, json, time, asyncio, argparse
+from urllib.parse import urlsplit, parse_qs
+from contextlib import asynccontextmanager
+import psutil
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from bs4 import BeautifulSoup
@@ -17,21 +20,42 @@ from crawl4ai import (
 )
 
 from crawl4ai.extraction_strategy import LLMExtractionStrategy
+from extraction_cache import ExtractionCache, strategy_key
+from llm_scheduler import LLMScheduler, Provider
+from records import parse_delivery
+from metrics import METRICS, TOKEN_BUCKETS
+from compaction import (EXCLUDED_HEADINGS, EXCLUDED_TAGS, CompactionStats, build_schema_prompt,
+                        compact_json_schema, compact_section, count_tokens)
 
 # ── 1. load keys ─────────────────────────────────────────────────────────
 load_dotenv()
 # highlight-start
 # DEFINE all the URLs we need to visit to get the complete data
-BASE_URL = "https://training.gov.au/organisation/details/0115"
-URLS_TO_SCRAPE = [
-    f"{BASE_URL}/summary",
-    f"{BASE_URL}/contacts",
-    f"{BASE_URL}/addresses",
-    f"{BASE_URL}/qualifications",
-    f"{BASE_URL}/courses",
-]
+RTO_DETAILS_URL = "https://training.gov.au/organisation/details/{code}"
+RTO_SECTIONS = ["summary", "contacts", "addresses", "qualifications", "courses"]
+
+def rto_urls(code):
+    """The five section URLs for one RTO code."""
+    base_url = RTO_DETAILS_URL.format(code=str(code).zfill(4))
+    return [f"{base_url}/{section}" for section in RTO_SECTIONS]
+
+BASE_URL = RTO_DETAILS_URL.format(code="0115")
+URLS_TO_SCRAPE = rto_urls("0115")
 # highlight-end
 
+# Batch driver (run_batch) limits and I/O
+RTO_CODES_CSV = "data/rto_filtered.csv"
+BATCH_OUTPUT_PATH = "data/rto_extractions.jsonl"
+BATCH_REPORT_PATH = "data/rto_extractions.report.json"   # JSON run report (metrics.py) after each batch
+PAGE_CONCURRENCY = 4      # browser pages loading at once (= warm sessions in the CrawlerPool)
+LLM_CONCURRENCY = 2       # LLM requests in flight at first; the scheduler adapts between 1 and LLM_MAX_CONCURRENCY
+LLM_MAX_CONCURRENCY = 8
+PAGE_RECYCLE_AFTER = 50   # close and reopen a pooled page after this many loads
+BROWSER_RSS_CAP_MB = 2048 # restart the browser once its process tree grows past this
+LLM_CACHE_ENABLED = True  # reuse stored extractions for unchanged page content (see extraction_cache.py)
+COMPACT_PROMPT = True     # schema-derived instruction + pruned section markdown (see compaction.py)
+REPORT_COMPACTION = False # also tokenize the full, uncompacted prompt per RTO to report the saving (costs time)
+
 # ── 2. declare a schema that matches the *instruction* ───────────────────
 # (Your Pydantic models: Qualifications, Courses, RTO_Model remain the same)
 class Qualifications(BaseModel):
@@ -240,6 +264,18 @@ Generated json (the only output you should return):
 }
 """
 
+# The handful of rules from INSTRUCTION_TO_LLM that actually apply to RTO_Model
+COMPACT_RULES = [
+    "Each section starts with '# Section: <name>'. Take each field only from the section its description names.",
+    "ABN, ACN and phone numbers: digits only, no spaces (e.g. \"40009668553\").",
+    "Web Address and Registration Manager: the exact URL from the markdown link [text](url), not the link text.",
+    "Address: the head office address only.",
+    "Qualifications / Courses: every row of that section's table, Status as shown (Current / Non-Current). "
+    "Never include Units or Skill Sets.",
+    "Delivery Notification: list of states; NATIONAL means [\"NSW\", \"VIC\", \"QLD\", \"SA\", \"WA\", \"TAS\", \"NT\", \"ACT\"].",
+]
+COMPACT_INSTRUCTION_TO_LLM = build_schema_prompt(RTO_Model, COMPACT_RULES)
+
 # ── 3. Configure the LLM ──────────────────────────────────────────────────
 # llm_cfg = LLMConfig(
 #     provider="gemini/gemini-2.0-flash",          # ✅ include model in the provider string
@@ -252,23 +288,49 @@ llm_cfg = LLMConfig(
     base_url="https://api.deepseek.com"
 )
 
+# Failover provider, used only when its key is set
+fallback_llm_cfg = LLMConfig(
+    provider="gemini/gemini-2.0-flash",
+    api_token=os.getenv('GEMINI_API_KEY'),
+) if os.getenv('GEMINI_API_KEY') else None
+
+# Requests / tokens per minute we allow ourselves per provider (kept under the published limits)
+LLM_LIMITS = {
+    "deepseek/deepseek-chat": {"rpm": 60, "tpm": 300_000},
+    "gemini/gemini-2.0-flash": {"rpm": 15, "tpm": 1_000_000},
+}
+
 # ── 4. attach the extraction strategy ────────────────────────────────────
 llm_strategy = LLMExtractionStrategy(
     llm_config=llm_cfg,
-    schema=RTO_Model.model_json_schema(),      
+    schema=compact_json_schema(RTO_Model) if COMPACT_PROMPT else RTO_Model.model_json_schema(),
     extraction_type="schema",
-    instruction=INSTRUCTION_TO_LLM,
+    instruction=COMPACT_INSTRUCTION_TO_LLM if COMPACT_PROMPT else INSTRUCTION_TO_LLM,
     chunk_token_threshold=1000,
     apply_chunking=False,
     overlap_rate=0.0,
     input_format="markdown",
 )
 
-crawl_cfg = CrawlerRunConfig(
-    extraction_strategy=llm_strategy,
+# Same extraction minus the scope lists, for RTOs whose tables parse_scope_table already read
+SCOPE_FIELDS = ("qualifications", "courses")
+details_strategy = LLMExtractionStrategy(
+    llm_config=llm_cfg,
+    schema=compact_json_schema(RTO_Model, exclude=SCOPE_FIELDS),
+    extraction_type="schema",
+    instruction=build_schema_prompt(RTO_Model, COMPACT_RULES[:4], exclude=SCOPE_FIELDS),
+    chunk_token_threshold=1000,
+    apply_chunking=False,
+    overlap_rate=0.0,
+    input_format="markdown",
+)
+
+# Pages are crawled without extraction; llm_strategy runs once over all five sections (see build_rto_context)
+page_cfg = CrawlerRunConfig(
     cache_mode=CacheMode.DISABLED,
     remove_overlay_elements=True,
     exclude_external_links=True,
+    excluded_tags=EXCLUDED_TAGS if COMPACT_PROMPT else None,
     page_timeout=300000,
 )
 
@@ -283,36 +345,318 @@ url_strategy = LLMExtractionStrategy(
     input_format="html",
 )
 
-url_cfg = CrawlerRunConfig(
-    extraction_strategy=url_strategy,
-    cache_mode=CacheMode.DISABLED,
-    remove_overlay_elements=True,
-    exclude_external_links=True,
-    page_timeout=300000,
-)
-
 browser_cfg = BrowserConfig(
-    headless=False, 
+    headless=True, 
     verbose=True, 
     text_mode=False,
 )
 
-async def url_scrape():
-    async with AsyncWebCrawler(config=browser_cfg) as crawler:
-        result = await crawler.arun(URLS_TO_SCRAPE[0], config=url_cfg)
+# ── 4b. Shared browser pool ──────────────────────────────────────────────
+class CrawlerPool:
+    """
+    One long-lived headless AsyncWebCrawler with a fixed set of warm page sessions.
+    Crawls lease a session (which also caps concurrent page loads), a session's page is
+    recycled after `recycle_after` loads, and the whole browser is restarted between
+    leases once its process tree passes `rss_cap_mb`.
+    """
+    def __init__(self, size=PAGE_CONCURRENCY, recycle_after=PAGE_RECYCLE_AFTER, rss_cap_mb=BROWSER_RSS_CAP_MB,
+                 config=browser_cfg):
+        self.size = size
+        self.recycle_after = recycle_after
+        self.rss_cap_mb = rss_cap_mb
+        self.config = config
+        self.crawler = None
+        self.pages_loaded = 0
+        self.restarts = 0
+        self._uses = {}
+        self._sessions = asyncio.Queue()
+        self._restart_lock = asyncio.Lock()
+        self._restart_task = None
+
+    async def __aenter__(self):
+        self.crawler = AsyncWebCrawler(config=self.config)
+        await self.crawler.start()
+        for ix in range(self.size):
+            session_id = f"pool-{ix}"
+            self._uses[session_id] = 0
+            self._sessions.put_nowait(session_id)
+        return self
 
-        if result.success:            
-            data = json.loads(result.extracted_content)
-            print("✅ extracted", len(data), "items")
-            for p in data[:10]: print(p)
-            return data[0]
-            
-        else:
-            print("❌ error:", result.error_message)
-            print(llm_strategy.show_usage())   # token cost insight
+    async def __aexit__(self, *exc):
+        try:
+            if self._restart_task is not None:
+                await self._restart_task
+        finally:
+            await self.crawler.close()
+
+    def _check_restart(self):
+        """Re-raise a failed background restart instead of losing it with the task."""
+        task = self._restart_task
+        if task is not None and task.done():
+            self._restart_task = None
+            task.result()
+
+    def browser_rss_mb(self):
+        """Resident memory of everything this process spawned (playwright driver + browser)."""
+        total = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+    @asynccontextmanager
+    async def lease(self):
+        """Borrow a warm session id for one crawl."""
+        self._check_restart()
+        session_id = await self._sessions.get()
+        try:
+            yield session_id
+        finally:
+            self._uses[session_id] += 1
+            self.pages_loaded += 1
+            if self._uses[session_id] >= self.recycle_after:
+                await self.crawler.crawler_strategy.kill_session(session_id)
+                self._uses[session_id] = 0
+            self._sessions.put_nowait(session_id)
+            if self.rss_cap_mb and self._restart_task is None and self.browser_rss_mb() > self.rss_cap_mb:
+                self._restart_task = asyncio.ensure_future(self._restart())
+
+    async def _restart(self):
+        """Wait for every session to come back, then restart the browser with fresh pages."""
+        if self._restart_lock.locked():
+            return
+        async with self._restart_lock:
+            drained = [await self._sessions.get() for _ in range(self.size)]
+            try:
+                if self.browser_rss_mb() > self.rss_cap_mb:
+                    print(f"♻️  Browser over {self.rss_cap_mb} MB RSS, restarting...")
+                    await self.crawler.close()
+                    self.crawler = AsyncWebCrawler(config=self.config)
+                    await self.crawler.start()
+                    self._uses = {session_id: 0 for session_id in drained}
+                    self.restarts += 1
+            finally:
+                for session_id in drained:
+                    self._sessions.put_nowait(session_id)
+
+    async def arun(self, url, config):
+        async with self.lease() as session_id:
+            started = time.perf_counter()
+            result = await self.crawler.arun(url, config=config.clone(session_id=session_id))
+            METRICS.observe("page_crawl_seconds", time.perf_counter() - started, success=result.success)
+            METRICS.inc("pages_crawled_total", success=result.success)
+            return result
+
+# ── 4c. Cached LLM calls ─────────────────────────────────────────────────
+_extraction_cache = None
+
+def get_extraction_cache(use_cache=LLM_CACHE_ENABLED):
+    """Process-wide ExtractionCache, opened on first use (None when use_cache is off)."""
+    global _extraction_cache
+    if not use_cache:
+        return None
+    if _extraction_cache is None:
+        _extraction_cache = ExtractionCache()
+    return _extraction_cache
+
+_llm_scheduler = None
+
+def get_llm_scheduler(initial_concurrency=LLM_CONCURRENCY, max_concurrency=LLM_MAX_CONCURRENCY):
+    """
+    Process-wide LLMScheduler over llm_cfg (and fallback_llm_cfg when configured), created
+    on first use; the arguments only apply to that first call.
+    """
+    global _llm_scheduler
+    if _llm_scheduler is None:
+        providers = [Provider(cfg, **LLM_LIMITS.get(cfg.provider, {})) for cfg in (llm_cfg, fallback_llm_cfg) if cfg]
+        _llm_scheduler = LLMScheduler(providers, initial_concurrency, max(max_concurrency, initial_concurrency))
+    return _llm_scheduler
+
+async def cached_aextract(strategy, url, content, use_cache=LLM_CACHE_ENABLED):
+    """
+    strategy.aextract() behind the content-addressed extraction cache (the same cleaned
+    content, instruction, schema and model never pays for tokens twice; use_cache=False
+    always calls the LLM) and the LLM scheduler (rate budgets, retries, adaptive
+    concurrency, failover).
+    """
+    cache = get_extraction_cache(use_cache)
+    key = strategy_key(strategy, content) if cache else None
+    if cache:
+        blocks = cache.get(key)
+        METRICS.inc("llm_cache_lookups_total", result="miss" if blocks is None else "hit")
+        if blocks is not None:
+            return blocks
+
+    blocks, provider = await get_llm_scheduler().extract_with_provider(strategy, url, content)
+
+    if cache and blocks and not any(block.get("error") for block in blocks):
+        # Keyed by the model that answered: a failover answer must not pose as the primary's
+        if provider is not None and provider.llm_config is not strategy.llm_config:
+            key = strategy_key(strategy, content, provider.llm_config)
+        cache.put(key, blocks, url)
+    return blocks
+
+# ── 4d. ABN / Web Address from the summary HTML ─────────────────────────
+# Labels every rendered /summary page shows, whether or not the RTO has an ABN or website
+_SUMMARY_LABELS = re.compile(r"\blegal\s+name\b|\brto\s+type\b|\bregistration\s+manager\b", re.I)
+
+def summary_rendered(html):
+    """True when the /summary HTML holds the summary fields, i.e. a missing link really is missing."""
+    return bool(_SUMMARY_LABELS.search(BeautifulSoup(html or "", "html.parser").get_text(" ")))
+
+def parse_summary_links(html):
+    """
+    Read ABN and Web Address straight off the /summary page: the ABN is the
+    abr.business.gov.au lookup link, the web address is the "Visit the website" anchor.
+    Missing fields come back as None.
+    """
+    soup = BeautifulSoup(html or "", "html.parser")
+    fields = {"ABN": None, "Web Address": None}
+
+    abr = soup.find("a", href=re.compile(r"abr\.business\.gov\.au", re.I))
+    if abr is not None:
+        search_text = parse_qs(urlsplit(abr["href"]).query).get("SearchText", [""])[0]
+        digits = re.sub(r"\D", "", search_text) or re.sub(r"\D", "", abr.find(string=True) or "")
+        if len(digits) == 11:
+            fields["ABN"] = digits
+
+    website = soup.find("a", title=re.compile(r"^Visit the website", re.I), href=True)
+    if website is not None and website["href"].startswith(("http://", "https://")):
+        fields["Web Address"] = website["href"].strip()
+    return fields
+
+async def url_scrape(summary_url, summary_html, use_cache=LLM_CACHE_ENABLED):
+    """
+    ABN / Web Address for an already-crawled summary page. Parsed deterministically;
+    url_strategy (LLM) is only asked when the summary itself didn't render. A field the
+    rendered page doesn't show (e.g. no website) stays None.
+    """
+    fields = parse_summary_links(summary_html)
+    if all(fields.values()) or summary_rendered(summary_html):
+        return fields
+
+    print(f"⚠️  No summary fields in {summary_url} HTML, asking the LLM for ABN/Web Address...")
+    llm_fields = merge_extracted_blocks(await cached_aextract(url_strategy, summary_url, summary_html, use_cache))
+    return {key: value or llm_fields.get(key) for key, value in fields.items()}
+
+# ── 4e. Qualifications / Courses tables ──────────────────────────────────
+# Table header text -> Qualifications/Courses key
+SCOPE_TABLE_HEADERS = {
+    "code": "Code",
+    "title": "Title",
+    "status": "Status",
+    "start date": "Start Date",
+    "scope start date": "Start Date",
+    "end date": "End Date",
+    "scope end date": "End Date",
+    "delivery notification": "Delivery Notification",
+    "delivery notifications": "Delivery Notification",
+    "delivery": "Delivery Notification",
+}
+_EMPTY_SCOPE = re.compile(r"\bno (qualifications|courses|accredited courses|records|results)\b.*\bfound\b|"
+                          r"\bno (qualifications|courses|records|results)\b", re.I)
+
+def _preceding_heading(table):
+    heading = table.find_previous(re.compile(r"^h[1-6]$"))
+    return heading.get_text(" ", strip=True) if heading else ""
+
+def parse_scope_table(html):
+    """
+    Read the Qualifications/Courses table off a section page into the Title Case dicts the
+    LLM would return. Returns [] for a page that says it has none, and None when the page
+    is ambiguous (no recognisable table, or rows that don't line up) so the caller can
+    fall back to the LLM.
+    """
+    soup = BeautifulSoup(html or "", "html.parser")
+    for table in soup.find_all("table"):
+        if EXCLUDED_HEADINGS.match(_preceding_heading(table)):
+            continue
+        header_row = table.find("tr")
+        if header_row is None:
+            continue
+        headers = [cell.get_text(" ", strip=True).lower() for cell in header_row.find_all(["th", "td"])]
+        keys = [SCOPE_TABLE_HEADERS.get(header) for header in headers]
+        if "Code" not in keys or "Title" not in keys:
+            continue
+
+        items = []
+        for row in header_row.find_next_siblings("tr") or table.select("tbody tr"):
+            cells = row.find_all(["td", "th"])
+            if not cells:
+                continue
+            if len(cells) != len(keys):
+                return None
+            item = {"Code": "", "Title": "", "Status": "", "Start Date": "", "End Date": "", "Delivery Notification": []}
+            for key, cell in zip(keys, cells):
+                if key == "Delivery Notification":
+                    item[key] = parse_delivery(cell.get_text(" ", strip=True))
+                elif key:
+                    item[key] = cell.get_text(" ", strip=True)
+            if not item["Code"]:
+                return None
+            items.append(item)
+        return items
+
+    text = soup.get_text(" ", strip=True)
+    return [] if _EMPTY_SCOPE.search(text) else None
+
+# ── 4f. One LLM call per RTO ──────────────────────────────────────────────
+compaction_stats = CompactionStats()
+
+def build_rto_context(results, compact=False, sections=RTO_SECTIONS):
+    """
+    Concatenate the crawled section pages into one markdown document, each under a
+    header naming its section and source URL, so a single LLM call sees the whole RTO.
+    compact=True prunes each section first (compaction.compact_section); `sections`
+    limits which pages are included.
+    """
+    parts = []
+    for section, result in zip(RTO_SECTIONS, results):
+        if section not in sections:
+            continue
+        markdown = compact_section(section, str(result.markdown)) if compact else result.markdown
+        parts.append(f"# Section: {section.title()} (/{section})\nSource URL: {result.url}\n\n{markdown}")
+    return "\n\n---\n\n".join(parts)
+
+def prompt_tokens(instruction, schema, context):
+    return count_tokens(instruction) + count_tokens(json.dumps(schema)) + count_tokens(context)
+
+def plan_rto_extraction(results):
+    """
+    Decide what the LLM has to read for one crawled RTO. Qualifications/Courses come from
+    their tables when both parse, and the LLM then only sees summary/contacts/addresses;
+    otherwise llm_strategy reads all five section-tagged pages.
+    Returns (strategy, context, scope) where scope maps section -> parsed items.
+    """
+    scope = {section: parse_scope_table(result.html)
+             for section, result in zip(RTO_SECTIONS, results) if section in ("qualifications", "courses")}
+    if all(items is not None for items in scope.values()):
+        strategy, sections = details_strategy, [s for s in RTO_SECTIONS if s not in scope]
+    else:
+        ambiguous = ", ".join(section for section, items in scope.items() if items is None)
+        print(f"⚠️  {results[0].url}: no clean {ambiguous} table, the LLM will read it")
+        strategy, sections, scope = llm_strategy, RTO_SECTIONS, {}
+
+    context = build_rto_context(results, compact=COMPACT_PROMPT, sections=sections)
+    if REPORT_COMPACTION:
+        before = prompt_tokens(INSTRUCTION_TO_LLM, RTO_Model.model_json_schema(), build_rto_context(results))
+        after = prompt_tokens(strategy.instruction, strategy.schema, context)
+        compaction_stats.add(before, after)
+        print(f"✂️  {results[0].url}: prompt {before} → {after} tokens")
+    return strategy, context, scope
+
+async def extract_rto_record(results, use_cache=LLM_CACHE_ENABLED):
+    """Run the planned LLM extraction and merge its blocks and the parsed tables into one record."""
+    strategy, context, scope = plan_rto_extraction(results)
+    record = merge_extracted_blocks(await cached_aextract(strategy, results[0].url, context, use_cache))
+    for section, items in scope.items():
+        record[section.title()] = items
+    return record
 
 # ── 5. Main script logic ─────────────────────────────────────────────────
-async def main():
+async def main(use_cache=LLM_CACHE_ENABLED):
     """
     Runs the two-step process:
     1. Crawls all target URLs to aggregate their content.
@@ -320,22 +664,207 @@ async def main():
     """
     print("🎯 Starting Step 1: Crawling and Aggregating Content...")
 
-    async with AsyncWebCrawler(config=browser_cfg) as crawler:
-        results = await crawler.arun_many(URLS_TO_SCRAPE, config=crawl_cfg)
-        result = results[-1]
+    async with CrawlerPool() as pool:
+        results = await asyncio.gather(*(pool.arun(url, config=page_cfg) for url in URLS_TO_SCRAPE))
+        failed = [r for r in results if not r.success]
 
-        if result.success:          
-            data = json.loads(result.extracted_content)
-            data_fix = await url_scrape()
-            data[0]['ABN'] = data_fix['ABN']
-            data[0]['Web Address'] = data_fix['Web Address']
+        if not failed:
+            print("🎯 Starting Step 2: Extracting from the combined sections...")
+            data = [await extract_rto_record(results, use_cache)]
+            data_fix = await url_scrape(results[0].url, results[0].html, use_cache)
+            for key in ("ABN", "Web Address"):
+                if data_fix[key]:
+                    data[0][key] = data_fix[key]
             print("✅ extracted", len(data), "items")
             for p in data[:10]: print(p)
             
         else:
-            print("❌ error:", result.error_message)
-            print(llm_strategy.show_usage())   # token cost insight
+            for r in failed: print("❌ error:", r.url, r.error_message)
+        if get_extraction_cache(use_cache): print(f"🗃️  {get_extraction_cache().summary()}")
+        if compaction_stats.calls: print(f"✂️  {compaction_stats.summary()}")
+        if _llm_scheduler: print(f"🚦 {_llm_scheduler.summary()}")
+        for strategy in (llm_strategy, details_strategy): strategy.show_usage()   # token cost insight
+
+
+# ── 6. Batch driver ──────────────────────────────────────────────────────
+def load_rto_codes(path=RTO_CODES_CSV, limit=None):
+    """Read RTO codes (zero-padded) from a scraper CSV with a 'Code' column."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        codes = [row["Code"].strip().zfill(4) for row in csv.DictReader(f) if row.get("Code", "").strip()]
+    return codes[:limit] if limit else codes
+
+def load_done_codes(path):
+    """Codes already written to a batch JSONL, so an interrupted batch can pick up where it stopped."""
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(str(json.loads(line).get("Code") or "").zfill(4))
+            except json.JSONDecodeError:
+                continue
+    return done
+
+def _item_marker(item):
+    """Identity of a list entry when merging: its Code if it has one, else its JSON."""
+    if isinstance(item, dict) and item.get("Code"):
+        return item["Code"]
+    return json.dumps(item, sort_keys=True)
+
+def merge_extracted_blocks(blocks):
+    """
+    Fold the LLM's extracted blocks into one record: first non-empty value wins for scalar
+    fields, list fields (Qualifications/Courses) are concatenated without duplicate codes.
+    """
+    record = {}
+    for block in blocks:
+        if block.get("error"):
+            continue
+        for key, value in block.items():
+            if key in ("index", "error", "tags"):
+                continue
+            if isinstance(value, list):
+                merged = record.setdefault(key, [])
+                seen = {_item_marker(item) for item in merged}
+                for item in value:
+                    if _item_marker(item) not in seen:
+                        merged.append(item)
+                        seen.add(_item_marker(item))
+            elif record.get(key) in (None, ""):
+                record[key] = value
+    return record
+
+async def extract_rto(pool, code, use_cache=LLM_CACHE_ENABLED):
+    """
+    Crawl one RTO's five sections through the shared pool (which bounds page loads), then
+    run one scheduled LLM extraction over all of them and take ABN/Web Address
+    from the summary HTML. Returns (record, error_message).
+    """
+    with METRICS.tally() as usage, METRICS.timer("rto_extract_seconds"):
+        result = await _extract_rto(pool, code, use_cache)
+    if usage.get("llm_calls"):
+        METRICS.observe("llm_tokens_per_rto", usage["prompt_tokens"] + usage["completion_tokens"],
+                        buckets=TOKEN_BUCKETS)
+    return result
+
+
+async def _extract_rto(pool, code, use_cache):
+    urls = rto_urls(code)
+    results = await asyncio.gather(*(pool.arun(url, config=page_cfg) for url in urls))
+    failed = [r for r in results if not r.success]
+    if failed:
+        return None, "; ".join(f"{r.url}: {r.error_message}" for r in failed)
+
+    record = await extract_rto_record(results, use_cache)
+    if not record:
+        return None, "LLM returned no usable blocks"
+
+    url_fix = await url_scrape(results[0].url, results[0].html, use_cache)
+    for key in ("ABN", "Web Address"):
+        if url_fix.get(key):
+            record[key] = url_fix[key]
+    record["Code"] = record.get("Code") or code
+    return record, None
+
+async def run_batch(codes, output_path=BATCH_OUTPUT_PATH, page_concurrency=PAGE_CONCURRENCY,
+                    llm_concurrency=LLM_CONCURRENCY, skip_done=True, use_cache=LLM_CACHE_ENABLED,
+                    report_path=BATCH_REPORT_PATH, prometheus_path=None):
+    """
+    Extract many RTOs through one shared CrawlerPool. Each finished record is appended
+    to output_path as one JSON line; failures go to <output_path>.errors.jsonl. Timings,
+    LLM latency and tokens per RTO go to report_path (JSON) and prometheus_path (textfile).
+    """
+    if skip_done:
+        done = load_done_codes(output_path)
+        codes = [code for code in codes if code not in done]
+        if done:
+            print(f"⏭️  Skipping {len(done)} RTOs already in {output_path}")
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    scheduler = get_llm_scheduler(initial_concurrency=llm_concurrency)
+    total, ok, failed = len(codes), 0, 0
+    print(f"🎯 Batch extracting {total} RTOs ({page_concurrency} pages / {llm_concurrency} LLM calls at once)...")
+
+    async with CrawlerPool(size=page_concurrency) as pool:
+        with METRICS.stage("batch_extract"), open(output_path, "a", encoding="utf-8") as out, \
+             open(f"{output_path}.errors.jsonl", "a", encoding="utf-8") as errors:
+
+            async def worker(code):
+                try:
+                    return code, *(await extract_rto(pool, code, use_cache))
+                except Exception as e:
+                    return code, None, f"{type(e).__name__}: {e}"
+
+            # Bound the number of RTOs in flight so results stream out as they finish.
+            pending = set()
+            queue = iter(codes)
+            for code in queue:
+                pending.add(asyncio.ensure_future(worker(code)))
+                if len(pending) >= page_concurrency * 2:
+                    break
+            while pending:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    code, record, error = task.result()
+                    if record is not None:
+                        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        out.flush()
+                        ok += 1
+                        METRICS.inc("rtos_extracted_total", outcome="ok")
+                        print(f"✅ ({ok + failed}/{total}) {code}")
+                    else:
+                        errors.write(json.dumps({"Code": code, "error": error}, ensure_ascii=False) + "\n")
+                        errors.flush()
+                        failed += 1
+                        METRICS.inc("rtos_extracted_total", outcome="failed")
+                        print(f"❌ ({ok + failed}/{total}) {code}: {error}")
+                    next_code = next(queue, None)
+                    if next_code is not None:
+                        pending.add(asyncio.ensure_future(worker(next_code)))
+
+        print(f"🧭 Browser pool: {pool.pages_loaded} page loads, {pool.restarts} restarts")
+        pool_stats = {"pages_loaded": pool.pages_loaded, "restarts": pool.restarts}
+    print(f"🎉 Batch done: {ok} extracted, {failed} failed → {output_path}")
+    cache = get_extraction_cache(use_cache)
+    if cache: print(f"🗃️  {cache.summary()}")
+    if compaction_stats.calls: print(f"✂️  {compaction_stats.summary()}")
+    print(f"🚦 {scheduler.summary()}")
+    for strategy in (llm_strategy, details_strategy): strategy.show_usage()   # token cost insight
+    print(f"⏱️  Stage timings: {METRICS.summary()}")
+    METRICS.write(report_path, prometheus_path, extra={
+        "rtos": {"total": total, "extracted": ok, "failed": failed},
+        "browser_pool": pool_stats,
+        "llm_scheduler": scheduler.stats(),
+        "llm_cache": cache.stats() if cache else None,
+        "compaction": {"prompts": compaction_stats.calls, "tokens_before": compaction_stats.tokens_before,
+                       "tokens_after": compaction_stats.tokens_after},
+        "token_usage": {name: {"prompt": s.total_usage.prompt_tokens, "completion": s.total_usage.completion_tokens}
+                        for name, s in (("scope", llm_strategy), ("details", details_strategy))},
+    })
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="LLM extraction of RTO details from training.gov.au.")
+    parser.add_argument("--batch", action="store_true", help="extract every RTO listed in --codes-csv")
+    parser.add_argument("--codes-csv", default=RTO_CODES_CSV)
+    parser.add_argument("--codes", nargs="*", help="explicit RTO codes (overrides --codes-csv)")
+    parser.add_argument("--limit", type=int, help="only the first N codes")
+    parser.add_argument("--output", default=BATCH_OUTPUT_PATH)
+    parser.add_argument("--page-concurrency", type=int, default=PAGE_CONCURRENCY)
+    parser.add_argument("--llm-concurrency", type=int, default=LLM_CONCURRENCY)
+    parser.add_argument("--no-llm-cache", action="store_true", help="always call the LLM, ignoring stored extractions")
+    parser.add_argument("--report", default=BATCH_REPORT_PATH, help="JSON run report path ('' to skip)")
+    parser.add_argument("--prometheus", metavar="PATH", help="also write metrics in Prometheus text format")
+    args = parser.parse_args()
+    use_cache = not args.no_llm_cache
+
+    if args.batch or args.codes:
+        if args.codes:
+            codes = [c.zfill(4) for c in args.codes][:args.limit]   # --limit applies to explicit codes too
+        else:
+            codes = load_rto_codes(args.codes_csv, args.limit)
+        asyncio.run(run_batch(codes, args.output, args.page_concurrency, args.llm_concurrency, use_cache=use_cache,
+                              report_path=args.report, prometheus_path=args.prometheus))
+    else:
+        asyncio.run(main(use_cache))
\ No newline at end of file
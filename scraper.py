@@ -2,14 +2,22 @@ import os
 import io
 import json
 import gzip
+import zlib
 import csv
+import time
+import re
+import asyncio
+import itertools
 import pandas as pd
-import requests
+import httpx
+import transport
+import http_cache
+from metrics import METRICS
+from records import ScopeItem, format_scope_items, split_components
 from datetime import datetime
-from seleniumwire import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from collections import deque
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
 
 # ------------------------
 # CONFIG
@@ -17,20 +25,62 @@ from selenium.webdriver.support import expected_conditions as EC
 START_URL = "https://training.gov.au/search?searchText=&searchType=RTO&status=0&status=2"
 START_API_URL = "api/organisation/csv"
 
+# Direct export request: the same search filters as START_URL, without the browser
+EXPORT_API_URL = (
+    f"https://training.gov.au/{START_API_URL}"
+    "?api-version=1.0&searchText=&searchType=RTO&status=0&status=2"
+)
+EXPORT_TIMEOUT = 120          # seconds; the full register is a multi-MB download
+EXPORT_CACHE_URL = EXPORT_API_URL   # cache key shared by the HTTP and Selenium bootstraps
+
 today_str = datetime.today().strftime("%Y-%m-%d")
 
+SCOPE_PAGE_SIZE = 100         # items requested per scope page; the rest are paged by `count`
+SCOPE_PAGE_WORKERS = 4        # concurrent page fetches per scope listing (sync path)
+
 QUALIFICATIONS_API_TEMPLATE = (
     "https://training.gov.au/api/organisation/{code}/scope"
-    f"?api-version=1.0&offset=0&pageSize=100&delivery=true"
+    f"?api-version=1.0&offset=0&pageSize={SCOPE_PAGE_SIZE}&delivery=true"
     f"&filters=componentType==qualification,DateNullSearch=={today_str}&sorts=code"
 )
 
 COURSES_API_TEMPLATE = (
     "https://training.gov.au/api/organisation/{code}/scope"
-    f"?api-version=1.0&offset=0&pageSize=100&delivery=true"
+    f"?api-version=1.0&offset=0&pageSize={SCOPE_PAGE_SIZE}&delivery=true"
     f"&filters=componentType==accreditedCourse,DateNullSearch=={today_str}&sorts=code"
 )
 
+# Combined mode: one paginated listing per RTO, split locally by componentType
+SCOPE_API_TEMPLATE = (
+    "https://training.gov.au/api/organisation/{code}/scope"
+    f"?api-version=1.0&offset=0&pageSize={SCOPE_PAGE_SIZE}&delivery=true"
+    f"&filters=componentType==qualification|accreditedCourse,DateNullSearch=={today_str}&sorts=code"
+)
+
+# Async scope fetcher limits (run_full)
+SCOPE_CONCURRENCY = 16        # max in-flight scope requests
+SCOPE_RATE_PER_HOST = 10.0    # max request starts per second per host
+SCOPE_REORDER_WINDOW = 256    # max RTOs fetched ahead of the next row written (streaming run_full)
+
+# On-disk response cache (see http_cache.py)
+HTTP_CACHE_PATH = http_cache.CACHE_PATH
+HTTP_CACHE_TTL = http_cache.CACHE_TTL
+
+# Incremental refresh (run_full(incremental=True))
+FULL_OUTPUT_FILENAME = "rto_with_qualifications_and_courses.csv"
+SCOPE_STATE_PATH = os.path.join("data", "rto_scope_state.json")   # per-code row hash + last scope fetch
+SCOPE_MAX_AGE_DAYS = 7        # re-fetch unchanged RTOs whose scope is older than this
+
+# Normalized columnar output (run_full(columnar_format="parquet" | "arrow"), see columnar.py)
+COLUMNAR_OUTPUT_DIR = os.path.join("data", "columnar")
+
+# Crash-safe progress journal (run_full(resume=True) / --resume)
+JOURNAL_PATH = os.path.join("data", "run_full.journal.jsonl")
+JOURNAL_FSYNC_EVERY = 64      # lines between fsyncs; every line is flushed regardless
+
+# Run metrics (metrics.py): JSON report written after every full run; Prometheus textfile on request
+REPORT_PATH = os.path.join("data", "run_full.report.json")
+
 # API → schema mapping
 API_TO_SCHEMA = {
     "Organisation Code": "Code",
@@ -71,13 +121,219 @@ PHASE2_COLUMNS = [
     "Qualifications", "Courses"
 ]
 
+# Export parse schema: every column is read as text (codes, ABN/ACN and phone numbers keep their
+# leading zeros) except these low-cardinality categoricals and the dd/mm/yyyy date columns.
+EXPORT_CATEGORY_COLUMNS = ["Status", "RTO Type", "Registration Manager", "Legal Authority"]
+EXPORT_DATE_COLUMNS = ["Initial Registration Date", "Registration Start Date", "Registration End Date"]
+EXPORT_DATE_FORMAT = "%d/%m/%Y"
+
+# Export columns that identify a registration change (scope columns are ours, not the export's)
+SUMMARY_COLUMNS = [c for c in PHASE2_COLUMNS if c not in ("Qualifications", "Courses")]
+
 # ------------------------
 # FUNCTIONS
 # ------------------------
-def get_all_rtos_via_selenium(url, api):
+def _peek_header(chunks):
+    """
+    Read just enough of a byte-chunk stream to get the CSV header. Returns (columns, chunks),
+    where the returned iterator still yields the whole stream.
+    """
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if b"\n" in head:
+            break
+    line = head.split(b"\n", 1)[0].decode("utf-8-sig").rstrip("\r")
+    return next(csv.reader([line]), []), itertools.chain([head], chunks)
+
+
+def _parse_export_dates(df):
+    """
+    Vectorized dd/mm/yyyy -> datetime64 for the export date columns. A column with any
+    value that doesn't fit the format is left as text rather than silently blanked.
+    """
+    for col in EXPORT_DATE_COLUMNS:
+        if col not in df.columns:
+            continue
+        parsed = pd.to_datetime(df[col], format=EXPORT_DATE_FORMAT, errors="coerce")
+        unparsed = parsed.isna() & df[col].ne("")
+        if unparsed.any():
+            print(f"[WARN] {unparsed.sum()} unrecognised dates in '{col}'; keeping it as text.")
+            continue
+        df[col] = parsed
+    return df
+
+
+def read_export_csv(chunks):
+    """
+    Parse the decompressed CSV export from an iterator of byte chunks with declared dtypes:
+    text everywhere, categoricals for EXPORT_CATEGORY_COLUMNS, dates for EXPORT_DATE_COLUMNS.
+    Uses pyarrow's multithreaded CSV reader when installed, pandas' C parser otherwise.
+    Returns (DataFrame, RTO codes).
+    """
+    columns, chunks = _peek_header(chunks)
+    stream = io.BufferedReader(_ChunkStream(chunks))
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+    except ImportError:
+        pa = None
+
+    if pa is not None:
+        column_types = {
+            col: pa.dictionary(pa.int32(), pa.string()) if col in EXPORT_CATEGORY_COLUMNS else pa.string()
+            for col in columns
+        }
+        table = pa_csv.read_csv(
+            stream,
+            # Quoted Address cells can span lines ("1st Floor\n86 Gawler Place...")
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types, strings_can_be_null=False, quoted_strings_can_be_null=False,
+            ),
+        )
+        df = table.to_pandas()
+    else:
+        df = pd.read_csv(io.TextIOWrapper(stream, encoding="utf-8-sig"), dtype=str, keep_default_na=False)
+        for col in EXPORT_CATEGORY_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+
+    df = _parse_export_dates(df)
+    rto_codes = df["Organisation Code"].tolist()
+    return df, rto_codes
+
+
+def _parse_export_csv(csv_bytes):
+    """
+    Parse the decompressed CSV export into (DataFrame, RTO codes).
+    """
+    return read_export_csv([csv_bytes])
+
+
+class _ChunkStream(io.RawIOBase):
+    """
+    Read-only file object over an iterator of byte chunks, so pandas can parse a
+    download while it is still arriving.
+    """
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = chunk
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+def _gunzip_chunks(chunks):
+    """
+    Incrementally gunzip a byte stream if it is a gzip payload; pass it through otherwise.
+    (httpx already undoes Content-Encoding; this handles exports served as .gz bodies.)
+    """
+    decompressor = None
+    for chunk in chunks:
+        if decompressor is None:
+            if not chunk:
+                continue
+            if chunk[:2] != b"\x1f\x8b":
+                yield chunk
+                yield from chunks
+                return
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        yield decompressor.decompress(chunk)
+    if decompressor is not None:
+        yield decompressor.flush()
+
+
+def _read_export_stream(chunks):
+    """
+    Parse the export CSV from an iterator of (possibly gzipped) byte chunks.
+    """
+    return read_export_csv(_gunzip_chunks(chunks))
+
+
+def get_all_rtos_via_http(api_url=EXPORT_API_URL):
+    """
+    Request the CSV export endpoint directly and parse the (gzipped) body as it streams in.
+    Returns (DataFrame, RTO codes), or (None, None) so callers can fall back to Selenium.
+    """
+    print("🚀 Fetching ALL RTOs from the export API...")
+    headers = {"Accept": "text/csv, application/octet-stream, */*", "Referer": START_URL}
+    try:
+        with transport.get_client().stream("GET", api_url, headers=headers, timeout=EXPORT_TIMEOUT) as r:
+            if r.extensions.get("offline_miss"):
+                print("❌ Error: offline mode and no cached RTO export.")
+                return None, None
+            r.raise_for_status()
+            df, rto_codes = _read_export_stream(r.iter_bytes())
+
+        print(f"🎉 Got {len(rto_codes)} RTO codes.")
+        return df, rto_codes
+
+    except (httpx.HTTPError, pd.errors.ParserError, KeyError, ValueError, zlib.error) as e:
+        print(f"❌ Error: direct export failed ({e}).")
+        return None, None
+
+
+def get_all_rtos(cache=None):
+    """
+    Bootstrap the RTO register: one direct HTTP request, with Selenium as the fallback.
+    """
+    with METRICS.stage("export_http"):
+        df, rto_codes = get_all_rtos_via_http()
+    if df is not None:
+        METRICS.inc("export_rows_total", len(rto_codes), source="http")
+        return df, rto_codes
+    if cache is not None and cache.offline:
+        return None, None
+    print("[INFO] Falling back to Selenium export capture.")
+    with METRICS.stage("export_selenium"):
+        df, rto_codes = get_all_rtos_via_selenium(START_URL, START_API_URL, cache=cache)
+    if df is not None:
+        METRICS.inc("export_rows_total", len(rto_codes), source="selenium")
+    return df, rto_codes
+
+
+def get_all_rtos_via_selenium(url, api, cache=None):
     """
     Opens RTO search, clicks export, intercepts CSV API, returns DataFrame and RTO codes.
+    With a ResponseCache, a fresh (or, offline, any) stored export skips the browser entirely.
     """
+    if cache is not None:
+        entry = cache.get(EXPORT_CACHE_URL)
+        if entry is not None and (cache.offline or cache.is_fresh(entry)):
+            try:
+                # Same decoding as the HTTP route, which may have stored a raw .gz body
+                df, rto_codes = _read_export_stream([entry.body])
+            except (pd.errors.ParserError, KeyError, ValueError, zlib.error) as e:
+                # ValueError covers pyarrow's ArrowInvalid; re-download rather than give up
+                print(f"[WARN] Cached RTO export could not be parsed ({e}); downloading it again.")
+            else:
+                cache.hits += 1
+                print(f"🎉 Got {len(rto_codes)} RTO codes (cached export).")
+                return df, rto_codes
+        cache.misses += 1
+        if cache.offline:
+            print("❌ Error: offline mode and no cached RTO export.")
+            return None, None
+
+    # Imported here so the browser stack is only needed when the direct export fails.
+    from seleniumwire import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     print("🚀 Starting Selenium to fetch ALL RTOs...")
     options = webdriver.ChromeOptions()
     options.add_argument('--headless=new')
@@ -103,11 +359,11 @@ def get_all_rtos_via_selenium(url, api):
 
         # Wait for API request
         request = driver.wait_for_request(api, timeout=60)
+        print(f"[INFO] Export captured from {request.url}")
         csv_bytes = gzip.decompress(request.response.body)
-        csv_text = csv_bytes.decode("utf-8-sig")
-
-        df = pd.read_csv(io.StringIO(csv_text))
-        rto_codes = df["Organisation Code"].astype(str).tolist()
+        df, rto_codes = _parse_export_csv(csv_bytes)
+        if cache is not None:
+            cache.put(EXPORT_CACHE_URL, 200, {"content-type": "text/csv"}, csv_bytes)
 
         print(f"🎉 Got {len(rto_codes)} RTO codes.")
         return df, rto_codes
@@ -123,143 +379,761 @@ def transform_api_response(df, mapping, final_columns):
     for col in final_columns:
         if col not in df.columns:
             df[col] = ""
+        elif pd.api.types.is_datetime64_any_dtype(df[col]):
+            # Written back in the export's own format, so snapshots stay comparable
+            df[col] = df[col].dt.strftime(EXPORT_DATE_FORMAT).fillna("")
     return df[final_columns].fillna("")
 
+class StreamingCSVWriter:
+    """
+    Row-at-a-time CSV writer matching save_filtered_csv's format. Writes to `<file>.partial`
+    (readable while the run is in progress) and renames it into place on finish().
+    """
+    def __init__(self, filename, columns, flush_every=50):
+        os.makedirs("data", exist_ok=True)
+        self.file_path = os.path.join("data", filename)
+        self.partial_path = f"{self.file_path}.partial"
+        self.flush_every = flush_every
+        self.rows = 0
+        self._file = open(self.partial_path, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._file, lineterminator="\n")
+        self._writer.writerow(columns)
+
+    def writerow(self, values):
+        self._writer.writerow(values)
+        self.rows += 1
+        if self.rows % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def finish(self):
+        self.close()
+        os.replace(self.partial_path, self.file_path)
+        print(f"✅ CSV saved: {self.file_path} ({self.rows} rows)")
+        return self.file_path
+
+
 def save_filtered_csv(df, filename):
     os.makedirs("data", exist_ok=True)
     file_path = os.path.join("data", filename)
-    df.to_csv(file_path, index=False, encoding="utf-8-sig")
+    with METRICS.stage("csv_write"):
+        df.to_csv(file_path, index=False, encoding="utf-8-sig")
     print(f"✅ CSV saved: {file_path}")
     return file_path
 
 
-def get_scope_data(api_url, retries=3, delay=1):
+def _scope_values(json_data, api_url):
+    """
+    Validate a scope API payload and return its list of raw items.
+    """
+    if json_data is None:
+        return []
+
+    if not isinstance(json_data, dict) or "value" not in json_data:
+        print(f"[WARN] Unexpected response schema for {api_url}")
+        return []
+
+    if json_data.get("count", 0) == 0 or not json_data["value"]:
+        return []
+
+    return json_data["value"]
+
+
+def _with_offset(api_url, offset):
+    """
+    Rewrite the `offset` query parameter of a scope URL, leaving the rest untouched.
+    """
+    return re.sub(r"([?&]offset=)\d+", lambda m: f"{m.group(1)}{offset}", api_url, count=1)
+
+
+def _remaining_offsets(api_url, first_page):
+    """
+    Plan the offsets still to fetch after the first page, using the response `count`.
+    """
+    values = first_page.get("value") or []
+    count = first_page.get("count", 0) or 0
+    match = re.search(r"[?&]offset=(\d+)", api_url)
+    start = int(match.group(1)) if match else 0
+    # Step by what the server actually returned, in case it caps pageSize below our request.
+    step = len(values)
+    if not step or start + step >= count:
+        return []
+    return list(range(start + step, count, step))
+
+
+class ScopeFetchError(Exception):
+    """
+    A scope page could not be fetched: retries exhausted, or not in the offline cache.
+    Unlike a 404 (the RTO has no scope), this says nothing about the RTO's scope.
+    """
+
+
+def _record_scope_response(response, elapsed):
     """
-    Fetch and parse scope data from the given API URL with retries and 404 handling.
-    Returns a list where each element is a list of "key: value" strings.
+    Scope request metrics: latency, status code (cache hits counted apart) and body size.
+    """
+    source = "cache" if response.extensions.get("cache_source") == "cache" else "network"
+    METRICS.observe("scope_request_seconds", elapsed, source=source)
+    METRICS.inc("scope_requests_total", status=response.status_code, source=source)
+    METRICS.inc("scope_response_bytes_total", len(response.content), source=source)
+
+
+def _fetch_scope_page(api_url, retries=3, delay=1):
+    """
+    Fetch one scope page with retries. Returns the parsed JSON, or None on 404;
+    raises ScopeFetchError when the page can't be fetched.
     """
     for attempt in range(retries):
         try:
-            r = requests.get(api_url, timeout=15)
+            started = time.perf_counter()
+            r = transport.get_client().get(api_url)
+            _record_scope_response(r, time.perf_counter() - started)
             if r.status_code == 404:
                 print(f"[INFO] No scope data found (404) for {api_url}")
-                return []
+                return None
+            if r.extensions.get("offline_miss"):
+                raise ScopeFetchError(f"not in offline cache: {api_url}")
 
             r.raise_for_status()
-            json_data = r.json()
-
-            if not isinstance(json_data, dict) or "value" not in json_data:
-                print(f"[WARN] Unexpected response schema for {api_url}")
-                return []
-
-            if json_data.get("count", 0) == 0 or not json_data["value"]:
-                return []
-
-            result = []
-            for item in json_data["value"]:
-                formatted_item = [
-                    f"deliveryAct: {item.get('deliveryAct', '')}",
-                    f"deliveryNsw: {item.get('deliveryNsw', '')}",
-                    f"deliveryNt: {item.get('deliveryNt', '')}",
-                    f"deliveryQld: {item.get('deliveryQld', '')}",
-                    f"deliverySa: {item.get('deliverySa', '')}",
-                    f"deliveryTas: {item.get('deliveryTas', '')}",
-                    f"deliveryVic: {item.get('deliveryVic', '')}",
-                    f"deliveryWa: {item.get('deliveryWa', '')}",
-                    f"isInternational: {item.get('isInternational', '')}",
-                    f"code: {item.get('code', '')}",
-                    f"componentType: {item.get('componentType', '')}",
-                    f"componentTypeLabel: {item.get('componentTypeLabel', '')}",
-                    f"endDate: {item.get('endDate', '')}",
-                    f"extent: {item.get('extent', '')}",
-                    f"extentLabel: {item.get('extentLabel', '')}",
-                    f"isImplicit: {item.get('isImplicit', '')}",
-                    f"nrtId: {item.get('nrtId', '')}",
-                    f"startDate: {item.get('startDate', '')}",
-                    f"status: {item.get('status', '')}",
-                    f"statusLabel: {item.get('statusLabel', '')}",
-                    f"title: {item.get('title', '')}"
-                ]
-                result.append(formatted_item)
-
-            return result
-
-        except requests.exceptions.RequestException as e:
+            return r.json()
+
+        except (httpx.HTTPError, ValueError) as e:
             print(f"[WARN] Attempt {attempt+1}/{retries} failed for {api_url}: {e}")
+            METRICS.inc("scope_errors_total", error=type(e).__name__)
             if attempt < retries - 1:
+                METRICS.inc("scope_retries_total")
                 time.sleep(delay * (attempt + 1))
-            else:
-                return []
 
-    return []
+    raise ScopeFetchError(f"{retries} attempts failed for {api_url}")
+
+
+def iter_scope_items(api_url, retries=3, delay=1):
+    """
+    Yield every raw scope item behind api_url. The first page's `count` plans the
+    remaining pages, which are fetched concurrently and yielded in order.
+    """
+    first_page = _fetch_scope_page(api_url, retries, delay)
+    yield from _scope_values(first_page, api_url)
+    if not isinstance(first_page, dict):
+        return
+
+    page_urls = [_with_offset(api_url, offset) for offset in _remaining_offsets(api_url, first_page)]
+    if not page_urls:
+        return
+
+    with ThreadPoolExecutor(max_workers=SCOPE_PAGE_WORKERS) as pool:
+        for page_url, page in zip(page_urls, pool.map(lambda u: _fetch_scope_page(u, retries, delay), page_urls)):
+            if page is None:
+                print(f"[WARN] Scope page missing, listing is incomplete: {page_url}")
+            yield from _scope_values(page, page_url)
+
+
+def get_scope_data(api_url, retries=3, delay=1):
+    """
+    Fetch and parse scope data from the given API URL with retries, 404 handling and pagination.
+    Returns a list of compact records.ScopeItem objects.
+    """
+    return [ScopeItem.from_api(item) for item in iter_scope_items(api_url, retries, delay)]
+
+
+def split_scope_items(items):
+    """
+    Split raw scope items by componentType into (qualifications, courses) ScopeItem lists.
+    Relative order is kept, so the server's code sort survives.
+    """
+    return split_components(items)
+
+
+def fetch_rto_scope(code, combined=False):
+    """
+    Fetch (quals_data, courses_data) for one RTO code, either with one request per
+    component type or, when combined, one listing split client-side.
+    """
+    padded_code = str(code).zfill(4)
+    if combined:
+        return split_scope_items(iter_scope_items(SCOPE_API_TEMPLATE.format(code=padded_code)))
+
+    quals_data = get_scope_data(QUALIFICATIONS_API_TEMPLATE.format(code=padded_code))
+    courses_data = get_scope_data(COURSES_API_TEMPLATE.format(code=padded_code))
+    return quals_data, courses_data
+
+
+def scope_cache_key(url):
+    """
+    Cache key for scope URLs: drop the DateNullSearch date so tomorrow's run revalidates
+    against today's ETag instead of starting cold.
+    """
+    return re.sub(r"DateNullSearch==\d{4}-\d{2}-\d{2}", "DateNullSearch==", url)
+
+
+def open_http_cache(offline=False, path=HTTP_CACHE_PATH, ttl=HTTP_CACHE_TTL):
+    """
+    Open the on-disk response cache and register it with the transport layer.
+    offline=True replays stored responses only and never touches the network.
+    """
+    cache = http_cache.ResponseCache(path, ttl=ttl, offline=offline, key_func=scope_cache_key)
+    transport.set_cache(cache)
+    return cache
+
+
+# ------------------------
+# ASYNC SCOPE FETCHER
+# ------------------------
+class HostRateLimiter:
+    """
+    Spaces out request starts so no host sees more than `rate` requests per second.
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def _fetch_scope_page_async(client, api_url, semaphore, limiter, retries=3, delay=1):
+    """
+    Async twin of _fetch_scope_page, bounded by the shared semaphore and per-host rate limiter.
+    """
+    for attempt in range(retries):
+        try:
+            async with semaphore:
+                await limiter.wait(api_url)
+                started = time.perf_counter()
+                r = await client.get(api_url)
+                _record_scope_response(r, time.perf_counter() - started)
+
+            if r.status_code == 404:
+                print(f"[INFO] No scope data found (404) for {api_url}")
+                return None
+            if r.extensions.get("offline_miss"):
+                raise ScopeFetchError(f"not in offline cache: {api_url}")
+
+            r.raise_for_status()
+            return r.json()
+
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"[WARN] Attempt {attempt+1}/{retries} failed for {api_url}: {e}")
+            METRICS.inc("scope_errors_total", error=type(e).__name__)
+            if attempt < retries - 1:
+                METRICS.inc("scope_retries_total")
+                await asyncio.sleep(delay * (attempt + 1))
+
+    raise ScopeFetchError(f"{retries} attempts failed for {api_url}")
+
+
+async def iter_scope_items_async(client, api_url, semaphore, limiter, retries=3, delay=1):
+    """
+    Async generator over every raw scope item behind api_url. Remaining pages are
+    scheduled together once the first page's `count` is known, then yielded in order.
+    """
+    first_page = await _fetch_scope_page_async(client, api_url, semaphore, limiter, retries, delay)
+    for item in _scope_values(first_page, api_url):
+        yield item
+    if not isinstance(first_page, dict):
+        return
+
+    page_urls = [_with_offset(api_url, offset) for offset in _remaining_offsets(api_url, first_page)]
+    tasks = [
+        asyncio.ensure_future(_fetch_scope_page_async(client, u, semaphore, limiter, retries, delay))
+        for u in page_urls
+    ]
+    try:
+        for page_url, task in zip(page_urls, tasks):
+            page = await task
+            if page is None:
+                print(f"[WARN] Scope page missing, listing is incomplete: {page_url}")
+            for item in _scope_values(page, page_url):
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def get_scope_data_async(client, api_url, semaphore, limiter, retries=3, delay=1):
+    """
+    Async twin of get_scope_data: same parsing, retries, 404 handling and pagination.
+    """
+    return [
+        ScopeItem.from_api(item)
+        async for item in iter_scope_items_async(client, api_url, semaphore, limiter, retries, delay)
+    ]
+
+
+async def fetch_rto_scope_async(client, code, semaphore, limiter, combined=False):
+    """
+    Async twin of fetch_rto_scope.
+    """
+    padded_code = str(code).zfill(4)
+    if combined:
+        api_url = SCOPE_API_TEMPLATE.format(code=padded_code)
+        items = [item async for item in iter_scope_items_async(client, api_url, semaphore, limiter)]
+        return split_scope_items(items)
+
+    quals_data, courses_data = await asyncio.gather(
+        get_scope_data_async(client, QUALIFICATIONS_API_TEMPLATE.format(code=padded_code), semaphore, limiter),
+        get_scope_data_async(client, COURSES_API_TEMPLATE.format(code=padded_code), semaphore, limiter),
+    )
+    return quals_data, courses_data
+
+
+async def iter_scope_results_async(rto_codes, concurrency=SCOPE_CONCURRENCY, rate_per_host=SCOPE_RATE_PER_HOST,
+                                   combined=False, on_result=None, ordered=True, window=SCOPE_REORDER_WINDOW):
+    """
+    Async generator of (code, quals, courses) with the formatted scope strings for each code.
+    At most `window` codes are in flight or waiting to be consumed, so memory stays bounded.
+    ordered=True yields in rto_codes order (a slow code holds back the ones behind it);
+    ordered=False yields in completion order.
+    on_result(code, quals, courses) is called as each code completes (e.g. to journal it).
+    A code whose scope fetch failed is yielded with None for quals/courses and not passed to on_result.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = HostRateLimiter(rate_per_host)
+    total = len(rto_codes)
+    done = 0
+
+    async with transport.make_async_client(max_connections=concurrency, max_keepalive=concurrency) as client:
+        async def fetch_one(code):
+            nonlocal done
+            padded_code = str(code).zfill(4)
+            try:
+                with METRICS.timer("rto_scope_seconds"):
+                    quals_data, courses_data = await fetch_rto_scope_async(client, code, semaphore, limiter, combined)
+            except ScopeFetchError as e:
+                done += 1
+                METRICS.inc("scope_failed_rtos_total")
+                print(f"[WARN] ({done}/{total}) Scope fetch failed for RTO {padded_code}: {e}")
+                return code, None, None
+            METRICS.inc("scope_items_total", len(quals_data), component="qualification")
+            METRICS.inc("scope_items_total", len(courses_data), component="accreditedCourse")
+            quals = format_scope_items(quals_data)
+            courses = format_scope_items(courses_data)
+            if on_result is not None:
+                on_result(code, quals, courses)
+            done += 1
+            print(f"[INFO] ({done}/{total}) Fetched scope for RTO {padded_code}.")
+            return code, quals, courses
+
+        remaining = iter(rto_codes)
+        pending = deque()
+
+        def refill():
+            for code in remaining:
+                pending.append(asyncio.ensure_future(fetch_one(code)))
+                if len(pending) >= window:
+                    break
+
+        refill()
+        try:
+            while pending:
+                if ordered:
+                    result = await pending.popleft()
+                    refill()
+                    yield result
+                else:
+                    finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in finished:
+                        pending.remove(task)
+                    refill()
+                    for task in finished:
+                        yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+async def fetch_all_scope_async(rto_codes, concurrency=SCOPE_CONCURRENCY, rate_per_host=SCOPE_RATE_PER_HOST,
+                                combined=False, on_result=None):
+    """
+    Fan out the scope requests for every RTO code over one shared connection pool.
+    Returns (quals_map, courses_map) keyed by the code as given.
+    """
+    quals_map = {}
+    courses_map = {}
+    async for code, quals, courses in iter_scope_results_async(
+        rto_codes, concurrency, rate_per_host, combined, on_result, ordered=False, window=max(len(rto_codes), 1)
+    ):
+        # Map using the unpadded code from CSV
+        quals_map[code] = quals or ""
+        courses_map[code] = courses or ""
+    return quals_map, courses_map
+
+
+def fetch_all_scope(rto_codes, concurrency=SCOPE_CONCURRENCY, rate_per_host=SCOPE_RATE_PER_HOST, combined=False,
+                    on_result=None):
+    """
+    Blocking wrapper around fetch_all_scope_async.
+    """
+    return asyncio.run(fetch_all_scope_async(rto_codes, concurrency, rate_per_host, combined, on_result))
+
+
+# ------------------------
+# INCREMENTAL REFRESH
+# ------------------------
+def _code_key(code):
+    """
+    Normalise an RTO code (49, "49", "0049") to its zero-padded string form.
+    """
+    return str(code).strip().zfill(4)
+
+
+def _csv_roundtrip(df):
+    """
+    Render df the way save_filtered_csv writes it and read it back as strings, so fresh
+    export rows hash the same as rows loaded from a previous snapshot.
+    """
+    return pd.read_csv(io.StringIO(df.to_csv(index=False)), dtype=str, keep_default_na=False)
+
+
+def row_content_hashes(df):
+    """
+    Per-row content hash over SUMMARY_COLUMNS, keyed by padded RTO code.
+    """
+    flat = _csv_roundtrip(df[SUMMARY_COLUMNS])
+    hashes = pd.util.hash_pandas_object(flat, index=False)
+    return dict(zip(flat["Code"].map(_code_key), hashes.map("{:016x}".format)))
+
+
+def load_scope_state(path=SCOPE_STATE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_scope_state(state, path=SCOPE_STATE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=0, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_previous_scope(filename=FULL_OUTPUT_FILENAME):
+    """
+    Read Qualifications/Courses from the last snapshot as {code_key: (quals, courses)}.
+    """
+    file_path = os.path.join("data", filename)
+    if not os.path.exists(file_path):
+        return {}
+    df_prev = pd.read_csv(file_path, dtype=str, keep_default_na=False, encoding="utf-8-sig",
+                          usecols=["Code", "Qualifications", "Courses"])
+    return {
+        _code_key(code): (quals, courses)
+        for code, quals, courses in zip(df_prev["Code"], df_prev["Qualifications"], df_prev["Courses"])
+    }
+
+
+def plan_incremental(hashes, state, previous_scope, max_age_days=SCOPE_MAX_AGE_DAYS, today=None):
+    """
+    Decide which codes need a scope fetch. Returns (codes_to_fetch, counts) where counts
+    tallies new / changed / stale / failed (last fetch failed) / unchanged codes.
+    """
+    today = today or datetime.today().date()
+    to_fetch = set()
+    counts = {"new": 0, "changed": 0, "stale": 0, "failed": 0, "unchanged": 0}
+
+    for code, row_hash in hashes.items():
+        entry = state.get(code)
+        if entry is None or code not in previous_scope:
+            reason = "new"
+        elif entry.get("failed"):
+            reason = "failed"
+        elif entry.get("hash") != row_hash:
+            reason = "changed"
+        elif (today - datetime.strptime(entry["fetched"], "%Y-%m-%d").date()).days >= max_age_days:
+            reason = "stale"
+        else:
+            reason = "unchanged"
+
+        counts[reason] += 1
+        if reason != "unchanged":
+            to_fetch.add(code)
+
+    return to_fetch, counts
+
+
+def next_scope_state(hashes, state, fetched, failed, today):
+    """
+    Scope state after a run. Fetched codes get their new hash and today's date. A failed
+    code keeps its previous entry (its old scope was carried forward), flagged so the next
+    run retries it; a failed code with no previous entry is left out and counts as new.
+    """
+    new_state = {}
+    for code, row_hash in hashes.items():
+        if code in fetched:
+            new_state[code] = {"hash": row_hash, "fetched": today}
+        elif code in failed:
+            if code in state:
+                new_state[code] = {**state[code], "failed": today}
+        elif code in state:
+            new_state[code] = {**state[code], "hash": row_hash}
+    return new_state
 
 
-def format_list_of_lists_no_outer_brackets(items: list[list[str]]) -> str:
+# ------------------------
+# CHECKPOINT JOURNAL
+# ------------------------
+class ScopeJournal:
     """
-    Turn a list of lists like [[a,b],[c,d]] into:
-    "[a, b], [c, d]" (no outer brackets).
+    Append-only JSONL log of finished scope fetches, one line per RTO code.
+    Lines are flushed as written, so a crash or Ctrl-C loses at most the line in flight.
     """
-    if not items:
-        return ""
-    return ", ".join("[" + ", ".join(inner) + "]" for inner in items)
+    def __init__(self, path=JOURNAL_PATH, fsync_every=JOURNAL_FSYNC_EVERY):
+        self.path = path
+        self.fsync_every = fsync_every
+        self._file = None
+        self._pending = 0
+
+    def load(self):
+        """
+        Return {code_key: (quals, courses)} for every complete line; a torn last line is ignored.
+        """
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                done[entry["code"]] = (entry["quals"], entry["courses"])
+        return done
+
+    def open(self, resume=False):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if not resume and os.path.exists(self.path):
+            print(f"[WARN] Discarding previous journal {self.path} (not resuming).")
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        if resume and self._file.tell():
+            # Terminate a torn last line so the next entry starts cleanly.
+            self._file.write("\n")
+        return self
+
+    def append(self, code, quals, courses):
+        entry = {"code": _code_key(code), "quals": quals, "courses": courses}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
 
 
 # ------------------------
 # FULL RUN MODE
 # ------------------------
-def run_full():
-    df_all, rto_codes = get_all_rtos_via_selenium(START_URL, START_API_URL)
+async def _stream_full_csv(writers, df_transformed, rto_codes, fetch_codes, fetch_keys, known_scope,
+                           concurrency, rate_per_host, combined, on_result, preserve_order):
+    """
+    Write one enriched row per export row to every writer as soon as its scope is available. Rows whose
+    scope is already known (carried forward or journaled) need no fetch; a failed fetch falls back
+    to the known scope.
+    preserve_order=True keeps export order; out-of-order results wait in a window of at
+    most SCOPE_REORDER_WINDOW codes. preserve_order=False writes in completion order.
+    """
+    scope_position = PHASE2_COLUMNS.index("Qualifications")
+    results = iter_scope_results_async(
+        fetch_codes, concurrency, rate_per_host, combined, on_result, ordered=preserve_order,
+    )
+    rows = zip(rto_codes, df_transformed[PHASE2_COLUMNS[:scope_position]].itertuples(index=False, name=None))
+
+    def write(summary, scope):
+        values = list(summary) + list(scope)
+        for writer in writers:
+            started = time.perf_counter()
+            writer.writerow(values)
+            METRICS.inc("output_write_seconds_total", time.perf_counter() - started, sink=type(writer).__name__)
+        METRICS.inc("output_rows_total")
+
+    try:
+        if preserve_order:
+            # fetch_codes is a subsequence of rto_codes, so ordered results line up with the rows.
+            for code, summary in rows:
+                key = _code_key(code)
+                if key in fetch_keys:
+                    _, quals, courses = await results.__anext__()
+                    write(summary, known_scope.get(key, ("", "")) if quals is None else (quals, courses))
+                else:
+                    write(summary, known_scope.get(key, ("", "")))
+            return
+
+        pending_rows = {}
+        for code, summary in rows:
+            key = _code_key(code)
+            if key in fetch_keys:
+                pending_rows[key] = summary
+            else:
+                write(summary, known_scope.get(key, ("", "")))
+        async for code, quals, courses in results:
+            key = _code_key(code)
+            write(pending_rows.pop(key), known_scope.get(key, ("", "")) if quals is None else (quals, courses))
+    finally:
+        await results.aclose()
+
+
+
+def run_full(concurrency=SCOPE_CONCURRENCY, rate_per_host=SCOPE_RATE_PER_HOST, combined=False,
+             use_cache=True, offline=False, incremental=False, max_age_days=SCOPE_MAX_AGE_DAYS,
+             resume=False, preserve_order=True, columnar_format=None, report_path=REPORT_PATH,
+             prometheus_path=None):
+    cache = open_http_cache(offline=offline) if use_cache else None
+    df_all, rto_codes = get_all_rtos(cache=cache)
     if df_all is None:
         exit("❌ Could not fetch RTO list.")
 
-    df_transformed = transform_api_response(df_all, API_TO_SCHEMA, PHASE2_COLUMNS)
+    with METRICS.stage("transform"):
+        df_transformed = transform_api_response(df_all, API_TO_SCHEMA, PHASE2_COLUMNS)
+        hashes = row_content_hashes(df_transformed)
+    state = load_scope_state()
+    previous_scope = load_previous_scope() if incremental else {}
 
-    quals_map = {}
-    courses_map = {}
+    if incremental:
+        to_fetch, counts = plan_incremental(hashes, state, previous_scope, max_age_days)
+        print(f"[INFO] Incremental plan: {counts['new']} new, {counts['changed']} changed, "
+              f"{counts['stale']} stale, {counts['failed']} retried, {counts['unchanged']} carried forward.")
+        fetch_codes = [code for code in rto_codes if _code_key(code) in to_fetch]
+    else:
+        fetch_codes = rto_codes
 
-    for idx, code in enumerate(rto_codes, start=1):
-        padded_code = str(code).zfill(4)
-        print(f"[INFO] ({idx}/{len(rto_codes)}) Fetching scope for RTO {padded_code}...")
+    journal = ScopeJournal()
+    journaled = journal.load() if resume else {}
+    if journaled:
+        print(f"[INFO] Resuming: {len(journaled)} RTOs already in {journal.path}.")
+        fetch_codes = [code for code in fetch_codes if _code_key(code) not in journaled]
 
-        quals_data = get_scope_data(QUALIFICATIONS_API_TEMPLATE.format(code=padded_code))
-        courses_data = get_scope_data(COURSES_API_TEMPLATE.format(code=padded_code))
+    # Scope for codes we are not fetching, keyed by padded code (the export's Code column
+    # and its code list differ in type).
+    known_scope = dict(previous_scope)
+    known_scope.update(journaled)
+    fetch_keys = {_code_key(code) for code in fetch_codes}
 
-        # Map using the unpadded code from CSV
-        quals_map[code] = format_list_of_lists_no_outer_brackets(quals_data)
-        courses_map[code] = format_list_of_lists_no_outer_brackets(courses_data)
+    print(f"[INFO] Fetching scope for {len(fetch_codes)} RTOs ({concurrency} concurrent requests)...")
+    writers = [StreamingCSVWriter(FULL_OUTPUT_FILENAME, PHASE2_COLUMNS)]
+    if columnar_format:
+        import columnar   # needs pyarrow; only loaded when columnar output is asked for
+        writers.append(columnar.ColumnarWriter(COLUMNAR_OUTPUT_DIR, columnar_format))
+    # Only codes whose scope actually arrived are journaled and stamped as fetched; failed
+    # ones keep their known scope and old state entry, flagged for a retry next run.
+    fetched = set(journaled)
+
+    def on_result(code, quals, courses):
+        journal.append(code, quals, courses)
+        fetched.add(_code_key(code))
+
+    journal.open(resume=resume)
+    try:
+        with METRICS.stage("scope_fetch"):
+            asyncio.run(_stream_full_csv(
+                writers, df_transformed, rto_codes, fetch_codes, fetch_keys, known_scope,
+                concurrency=concurrency, rate_per_host=rate_per_host, combined=combined,
+                on_result=on_result, preserve_order=preserve_order,
+            ))
+    finally:
+        journal.close()
+        for writer in writers:
+            writer.close()
+    with METRICS.stage("output_finish"):
+        for writer in writers:
+            writer.finish()
 
-    df_transformed["Qualifications"] = df_transformed["Code"].map(quals_map)
-    df_transformed["Courses"] = df_transformed["Code"].map(courses_map)
+    print(f"[INFO] Connection reuse: {transport.STATS.summary()}")
+    if cache is not None:
+        print(f"[INFO] HTTP cache: {cache.summary()}")
+    print(f"[INFO] Stage timings: {METRICS.summary()}")
+    METRICS.write(report_path, prometheus_path, extra={
+        "rtos": len(rto_codes),
+        "scope_fetched": len(fetched - set(journaled)),
+        "scope_failed": len(fetch_keys - fetched),
+        "connections": transport.STATS.as_dict(),
+        "http_cache": cache.stats() if cache is not None else None,
+    })
 
-    save_filtered_csv(df_transformed, "rto_with_qualifications_and_courses.csv")
+    today = datetime.today().strftime("%Y-%m-%d")
+    failed = fetch_keys - fetched
+    if failed:
+        print(f"[WARN] Scope fetch failed for {len(failed)} RTOs; they will be re-fetched next run.")
+    save_scope_state(next_scope_state(hashes, state, fetched, failed, today))
+    journal.remove()
     print("🎯 All done.")
 
 
 # ------------------------
 # SINGLE DEBUG MODE
 # ------------------------
-def run_debug_single(target_code="0049"):
-    # Load the Phase 2 CSV
-    df_all = pd.read_csv("data/rto_filtered.csv")
+def run_debug_single(target_code="0049", combined=False, use_cache=True, offline=False):
+    cache = open_http_cache(offline=offline) if use_cache else None
+
+    # Load the Phase 2 CSV as text, so codes and ABNs round-trip unchanged
+    df_all = pd.read_csv("data/rto_filtered.csv", dtype=str, keep_default_na=False, encoding="utf-8-sig")
     df_transformed = transform_api_response(df_all, API_TO_SCHEMA, PHASE2_COLUMNS)
 
-    padded_code = target_code.zfill(4)
+    padded_code = _code_key(target_code)
     print(f"[DEBUG] Fetching Qualifications & Courses for {padded_code}...")
 
-    quals_data = get_scope_data(QUALIFICATIONS_API_TEMPLATE.format(code=padded_code))
-    courses_data = get_scope_data(COURSES_API_TEMPLATE.format(code=padded_code))
+    try:
+        quals_data, courses_data = fetch_rto_scope(padded_code, combined=combined)
+    except ScopeFetchError as e:
+        exit(f"❌ Could not fetch scope for {padded_code}: {e}")
 
-    # Update only the matching row
-    df_transformed.loc[df_transformed["Code"] == int(target_code), "Qualifications"] = \
-        format_list_of_lists_no_outer_brackets(quals_data)
-    df_transformed.loc[df_transformed["Code"] == int(target_code), "Courses"] = \
-        format_list_of_lists_no_outer_brackets(courses_data)
+    # Update only the matching row (older snapshots hold unpadded codes)
+    match = df_transformed["Code"].map(_code_key) == padded_code
+    df_transformed.loc[match, "Qualifications"] = format_scope_items(quals_data)
+    df_transformed.loc[match, "Courses"] = format_scope_items(courses_data)
 
+    print(f"[DEBUG] Connection reuse: {transport.STATS.summary()}")
+    if cache is not None:
+        print(f"[DEBUG] HTTP cache: {cache.summary()}")
     save_filtered_csv(df_transformed, f"rto_debug_{target_code}.csv")
     print(f"✅ Debug CSV updated with qualifications & courses for {target_code}.")
 
 
 if __name__ == "__main__":
-    # Uncomment one of these:
-    run_full()
-    # run_debug_single("0049")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fetch the RTO register with qualification & course scope.")
+    parser.add_argument("--debug", metavar="CODE", help="only refresh one RTO into data/rto_debug_<CODE>.csv")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run from its journal")
+    parser.add_argument("--incremental", action="store_true", help="only re-fetch new, changed or stale RTOs")
+    parser.add_argument("--combined", action="store_true", help="one scope listing per RTO instead of two")
+    parser.add_argument("--offline", action="store_true", help="replay the HTTP cache without the network")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the on-disk HTTP cache")
+    parser.add_argument("--unordered", action="store_true", help="write rows as scope arrives, not in export order")
+    parser.add_argument("--columnar", choices=["parquet", "arrow"], help=f"also write tables to {COLUMNAR_OUTPUT_DIR}")
+    parser.add_argument("--concurrency", type=int, default=SCOPE_CONCURRENCY)
+    parser.add_argument("--report", default=REPORT_PATH, help="JSON run report path ('' to skip)")
+    parser.add_argument("--prometheus", metavar="PATH", help="also write metrics in Prometheus text format")
+    args = parser.parse_args()
+
+    if args.debug:
+        run_debug_single(args.debug, combined=args.combined, use_cache=not args.no_cache, offline=args.offline)
+    else:
+        run_full(concurrency=args.concurrency, combined=args.combined, use_cache=not args.no_cache,
+                 offline=args.offline, incremental=args.incremental, resume=args.resume,
+                 preserve_order=not args.unordered, columnar_format=args.columnar,
+                 report_path=args.report, prometheus_path=args.prometheus)
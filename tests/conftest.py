@@ -0,0 +1,7 @@
+# conftest.py
+# The scripts live at the repo root and import each other by module name.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,52 @@
+# test_extraction_cache.py
+# Extraction cache keys (what does and doesn't change them) and LRU eviction by size.
+
+import json
+from types import SimpleNamespace
+
+from extraction_cache import ExtractionCache, extraction_key, strategy_key
+
+SCHEMA = {"type": "object", "properties": {"Code": {"type": "string"}}}
+
+
+def test_extraction_key():
+    key = extraction_key("Legal name: Acme\n\n\n\nABN: 1  \n", "Extract", SCHEMA, "deepseek/deepseek-chat")
+    # Whitespace noise between crawls and schema key order don't matter
+    assert key == extraction_key("Legal name: Acme\r\n\r\nABN: 1\n", "Extract", dict(reversed(SCHEMA.items())),
+                                 "deepseek/deepseek-chat")
+    # Anything that can change the answer does
+    assert key != extraction_key("Legal name: Acme Pty\n\nABN: 1", "Extract", SCHEMA, "deepseek/deepseek-chat")
+    assert key != extraction_key("Legal name: Acme\n\nABN: 1", "Extract all", SCHEMA, "deepseek/deepseek-chat")
+    assert key != extraction_key("Legal name: Acme\n\nABN: 1", "Extract", {}, "deepseek/deepseek-chat")
+    assert key != extraction_key("Legal name: Acme\n\nABN: 1", "Extract", SCHEMA, "gemini/gemini-2.0-flash")
+    assert key != extraction_key("Legal name: Acme\n\nABN: 1", "Extract", SCHEMA, "deepseek/deepseek-chat",
+                                 "http://localhost:8000")
+
+    strategy = SimpleNamespace(instruction="Extract", schema=SCHEMA,
+                               llm_config=SimpleNamespace(provider="deepseek/deepseek-chat", base_url=None))
+    assert strategy_key(strategy, "Legal name: Acme\n\nABN: 1") == key
+    other = SimpleNamespace(provider="gemini/gemini-2.0-flash", base_url=None)
+    assert strategy_key(strategy, "Legal name: Acme\n\nABN: 1", other) != key
+
+
+def test_lru_eviction(tmp_path):
+    path = str(tmp_path / "extractions.sqlite")
+    blocks = [{"index": 0, "error": False, "content": "x" * 100}]
+    size = len(json.dumps(blocks))
+    cache = ExtractionCache(path, max_bytes=3 * size)
+    for key in "abc":
+        cache.put(key, blocks, url=f"https://x/{key}")
+    assert cache.get("a") == blocks   # "a" is now more recently used than "b"
+    cache.put("d", blocks)
+
+    assert cache.evictions == 1
+    assert cache.get("b") is None
+    assert [cache.get(key) is not None for key in "acd"] == [True, True, True]
+    assert (cache.hits, cache.misses, cache.stores) == (4, 1, 4)
+    cache.close()
+
+    # The running byte total survives a reopen: one more put evicts the least recently read ("a")
+    cache = ExtractionCache(path, max_bytes=3 * size)
+    cache.put("e", blocks)
+    assert cache.evictions == 1 and cache.get("a") is None and cache.get("c") is not None
+    cache.close()
@@ -0,0 +1,64 @@
+# test_http_cache.py
+# CachingTransport: fresh hits inside the TTL, 304 revalidation after it, and the offline 504 miss.
+
+import time
+
+import httpx
+
+from http_cache import CachingTransport, ResponseCache
+
+URL = "https://training.gov.au/api/organisation/0049/scope"
+
+
+class Server:
+    """MockTransport handler answering 200 with an ETag, or 304 to a matching If-None-Match."""
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"ETag": '"v1"'}, json={"count": 1})
+
+
+def test_ttl_revalidation_and_offline_miss(tmp_path):
+    path = str(tmp_path / "http_cache.sqlite")
+    cache = ResponseCache(path, ttl=60)
+    server = Server()
+    with httpx.Client(transport=CachingTransport(httpx.MockTransport(server), cache)) as client:
+        first = client.get(URL)
+        assert first.json() == {"count": 1} and first.extensions["cache_source"] == "network"
+
+        hit = client.get(URL)
+        assert hit.json() == {"count": 1} and hit.extensions["cache_source"] == "cache"
+        assert len(server.requests) == 1
+
+        # Past the TTL: a conditional request, answered 304 from the stored body
+        cache.ttl = 0
+        stale_at = cache.get(URL).stored_at
+        revalidated = client.get(URL)
+        assert revalidated.extensions["cache_source"] == "revalidated" and revalidated.json() == {"count": 1}
+        assert server.requests[-1].headers["If-None-Match"] == '"v1"'
+        assert cache.get(URL).stored_at > stale_at
+        assert (cache.hits, cache.revalidated, cache.misses) == (1, 1, 1)
+    cache.close()
+
+    offline = ResponseCache(path, ttl=0, offline=True)
+    with httpx.Client(transport=CachingTransport(httpx.MockTransport(server), offline)) as client:
+        # Offline serves even a stale entry, and never touches the network for a miss
+        assert client.get(URL).json() == {"count": 1}
+        miss = client.get(URL + "?offset=100")
+        assert miss.status_code == 504 and miss.extensions["offline_miss"]
+        assert len(server.requests) == 2
+    offline.close()
+
+
+def test_fresh_entry_expires(tmp_path):
+    cache = ResponseCache(str(tmp_path / "http_cache.sqlite"), ttl=60)
+    cache.put(URL, 200, {}, b"{}")
+    entry = cache.get(URL)
+    assert cache.is_fresh(entry)
+    entry.stored_at = time.time() - 61
+    assert not cache.is_fresh(entry)
+    cache.close()
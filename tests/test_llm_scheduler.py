@@ -0,0 +1,128 @@
+# test_llm_scheduler.py
+# LLMScheduler against fake strategies: backoff on throttling, AIMD concurrency and provider failover.
+
+import asyncio
+from types import SimpleNamespace
+
+import llm_scheduler
+from llm_scheduler import AdaptiveConcurrency, LLMScheduler, Provider, classify_blocks
+
+OK = [{"index": 0, "error": False, "content": "{}"}]
+THROTTLED = [{"index": 0, "error": True, "content": "litellm.RateLimitError: 429 Too Many Requests"}]
+BROKEN = [{"index": 0, "error": True, "content": "ValidationError: bad JSON"}]
+
+
+class Usage:
+    def __init__(self):
+        self.prompt_tokens = self.completion_tokens = self.total_tokens = 0
+
+
+class FakeStrategy:
+    """Answers from `script[provider]` in turn (the last answer repeats), recording which provider was used."""
+    def __init__(self, script):
+        self.script = script
+        self.llm_config = None
+        self.instruction = "Extract the RTO"
+        self.schema = {}
+        self.usages = []
+        self.total_usage = Usage()
+        self.calls = []
+
+    async def aextract(self, url, ix, content):
+        provider = self.llm_config.provider
+        self.calls.append(provider)
+        answers = self.script[provider]
+        self.total_usage.prompt_tokens += 10
+        return answers.pop(0) if len(answers) > 1 else answers[0]
+
+
+def provider(name):
+    return Provider(SimpleNamespace(provider=name), rpm=6000, tpm=10_000_000)
+
+
+def test_classify_blocks():
+    assert classify_blocks(OK) == "ok"
+    assert classify_blocks(THROTTLED) == "throttled"
+    assert classify_blocks([]) == "transient"
+    assert classify_blocks([{"error": True, "content": "503 Service Unavailable"}]) == "transient"
+    assert classify_blocks(BROKEN) == "failed"
+
+
+def test_backoff_then_success(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "BACKOFF_BASE", 0.01)
+    primary = provider("deepseek/deepseek-chat")
+    scheduler = LLMScheduler([primary], initial_concurrency=4, max_attempts=4)
+    strategy = FakeStrategy({primary.name: [THROTTLED, THROTTLED, OK]})
+
+    blocks, answered = asyncio.run(scheduler.extract_with_provider(strategy, "https://x", "content"))
+    assert blocks == OK and answered is primary
+    assert (scheduler.retries, scheduler.throttled, scheduler.failovers, scheduler.failed) == (2, 2, 0, 0)
+    assert primary.failures == 2 and primary.calls == 3
+    assert strategy.total_usage.prompt_tokens == 30   # every call's usage folded back
+    # Halved twice on throttling (4 -> 2 -> 1), then one additive step
+    assert scheduler.concurrency.limit == 2.0
+
+
+def test_gives_up_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "BACKOFF_BASE", 0.01)
+    primary = provider("deepseek/deepseek-chat")
+    scheduler = LLMScheduler([primary], max_attempts=2)
+    strategy = FakeStrategy({primary.name: [THROTTLED]})
+    assert asyncio.run(scheduler.extract(strategy, "https://x", "content")) == THROTTLED
+    assert (scheduler.retries, scheduler.failed) == (1, 1)
+
+    # A permanent failure is not retried
+    strategy = FakeStrategy({primary.name: [BROKEN]})
+    primary.cooldown_until = 0.0
+    assert asyncio.run(scheduler.extract(strategy, "https://x", "content")) == BROKEN
+    assert strategy.calls == [primary.name] and scheduler.failed == 2
+
+
+def test_failover_to_next_provider():
+    primary, fallback = provider("deepseek/deepseek-chat"), provider("gemini/gemini-2.0-flash")
+    scheduler = LLMScheduler([primary, fallback], max_attempts=3)
+    strategy = FakeStrategy({primary.name: [THROTTLED], fallback.name: [OK]})
+
+    blocks, answered = asyncio.run(scheduler.extract_with_provider(strategy, "https://x", "content"))
+    assert blocks == OK and answered is fallback
+    assert strategy.calls == [primary.name, fallback.name]
+    assert scheduler.failovers == 1 and primary.cooldown_until > 0
+    assert strategy.llm_config is None   # calls ran on copies; the shared strategy is untouched
+
+
+def test_aimd_limits():
+    async def run():
+        limit = AdaptiveConcurrency(initial=2, minimum=1, maximum=3)
+        for _ in range(10):
+            await limit.acquire()
+            await limit.release("ok")
+        assert limit.limit == 3
+        await limit.acquire()
+        await limit.release("throttled")
+        assert limit.limit == 1.5
+        for _ in range(3):
+            await limit.acquire()
+            await limit.release("throttled")
+        assert limit.limit == 1
+        await limit.acquire()
+        await limit.release("transient")   # neither grows nor shrinks
+        assert limit.limit == 1 and limit.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_failover_answer_cached_under_its_own_provider(monkeypatch, tmp_path):
+    import rto_scrape
+    from extraction_cache import ExtractionCache, strategy_key
+
+    primary, fallback = provider("deepseek/deepseek-chat"), provider("gemini/gemini-2.0-flash")
+    cache = ExtractionCache(str(tmp_path / "extractions.sqlite"))
+    monkeypatch.setattr(rto_scrape, "_extraction_cache", cache)
+    monkeypatch.setattr(rto_scrape, "_llm_scheduler", LLMScheduler([primary, fallback], max_attempts=3))
+    strategy = FakeStrategy({primary.name: [THROTTLED], fallback.name: [OK]})
+    strategy.llm_config = primary.llm_config
+
+    assert asyncio.run(rto_scrape.cached_aextract(strategy, "https://x", "content", use_cache=True)) == OK
+    assert cache.get(strategy_key(strategy, "content")) is None
+    assert cache.get(strategy_key(strategy, "content", fallback.llm_config)) == OK
+    cache.close()
@@ -0,0 +1,66 @@
+# test_page_parsing.py
+# Deterministic parsing of rendered training.gov.au pages: scope tables and the summary page links.
+
+from rto_scrape import parse_scope_table, parse_summary_links
+
+QUALIFICATIONS_PAGE = """
+<html><body>
+<h2>Qualifications</h2>
+<table>
+  <thead><tr><th>Code</th><th>Title</th><th>Status</th><th>Scope start date</th><th>Scope end date</th>
+  <th>Delivery notification</th></tr></thead>
+  <tbody>
+    <tr><td>BSB50420</td><td>Diploma of Leadership and Management</td><td>Current</td>
+        <td>01/Jan/2021</td><td>31/Dec/2026</td><td>QLD, NSW</td></tr>
+    <tr><td>CHC33021</td><td>Certificate III in Individual Support</td><td>Current</td>
+        <td>05/Mar/2022</td><td></td><td>National</td></tr>
+  </tbody>
+</table>
+<h2>Units of competency</h2>
+<table>
+  <tr><th>Code</th><th>Title</th></tr>
+  <tr><td>BSBLDR511</td><td>Develop and use emotional intelligence</td></tr>
+</table>
+</body></html>
+"""
+
+
+def test_scope_table():
+    items = parse_scope_table(QUALIFICATIONS_PAGE)
+    assert [item["Code"] for item in items] == ["BSB50420", "CHC33021"]
+    assert items[0] == {
+        "Code": "BSB50420", "Title": "Diploma of Leadership and Management", "Status": "Current",
+        "Start Date": "01/Jan/2021", "End Date": "31/Dec/2026", "Delivery Notification": ["NSW", "QLD"],
+    }
+    assert items[1]["End Date"] == ""
+    assert len(items[1]["Delivery Notification"]) == 8
+
+
+def test_scope_table_empty_and_ambiguous():
+    assert parse_scope_table("<h2>Courses</h2><p>No accredited courses found.</p>") == []
+    # Only an excluded table, or rows that don't line up with the header: let the LLM decide
+    assert parse_scope_table("<h2>Units</h2><table><tr><th>Code</th><th>Title</th></tr>"
+                             "<tr><td>X</td><td>Y</td></tr></table>") is None
+    assert parse_scope_table("<table><tr><th>Code</th><th>Title</th></tr><tr><td>X</td></tr></table>") is None
+    assert parse_scope_table("<p>Loading...</p>") is None
+
+
+SUMMARY_PAGE = """
+<html><body>
+<dl>
+  <dt>Legal name</dt><dd>Acme Training Pty Ltd</dd>
+  <dt>ABN</dt><dd><a href="https://abr.business.gov.au/SearchByAbn.aspx?SearchText=40%20009%20668%20553">
+      40 009 668 553</a></dd>
+  <dt>Web address</dt><dd><a href="https://www.acme.edu.au/" title="Visit the website (opens in a new window)">
+      www.acme.edu.au</a></dd>
+</dl>
+</body></html>
+"""
+
+
+def test_summary_links():
+    assert parse_summary_links(SUMMARY_PAGE) == {"ABN": "40009668553", "Web Address": "https://www.acme.edu.au/"}
+    # No ABN link, and a website anchor that isn't an http(s) URL
+    html = '<a href="mailto:info@acme.edu.au" title="Visit the website">email</a>'
+    assert parse_summary_links(html) == {"ABN": None, "Web Address": None}
+    assert parse_summary_links(None) == {"ABN": None, "Web Address": None}
@@ -0,0 +1,26 @@
+# test_records.py
+# ScopeItem must write the same cell text scraper.py always wrote, and read it back unchanged.
+
+from records import SCOPE_ITEM_KEYS, ScopeItem, parse_scope_cell
+
+
+def baseline_text(item):
+    """The pre-ScopeItem rendering of one raw scope item."""
+    return "[" + ", ".join(f"{key}: {item.get(key, '')}" for key in SCOPE_ITEM_KEYS) + "]"
+
+
+def test_null_flag_round_trip():
+    item = {"deliveryAct": None, "deliveryNsw": True, "deliveryNt": False, "isImplicit": None,
+            "code": "BSB50120", "componentType": "qualification", "statusLabel": None,
+            "title": "Diploma of Business, Operations"}
+    scope_item = ScopeItem.from_api(item)
+    text = scope_item.api_text()
+    assert text == baseline_text(item)
+    assert "deliveryAct: None" in text and "deliveryQld: ," in text
+
+    fields = parse_scope_cell(text)
+    assert len(fields) == 1
+    parsed = ScopeItem.from_cell_fields(fields[0])
+    assert parsed == scope_item
+    assert parsed.api_text() == text
+    assert parsed.flag("deliveryAct") is None and parsed.flag("deliveryNt") is False
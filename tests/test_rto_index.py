@@ -0,0 +1,40 @@
+# test_rto_index.py
+# find() must filter states through the scope_states index and apply its limit to RTOs, not item rows.
+
+import json
+
+from rto_index import RTOIndex, build_index
+
+
+def record(code, qualifications):
+    return {"Code": code, "Legal Name": f"RTO {code}", "Status": "Current", "Qualifications": [
+        {"Code": qual, "Title": f"Qualification {qual}", "Status": "Current", "Delivery Notification": states}
+        for qual, states in qualifications
+    ]}
+
+
+def test_state_filter_and_rto_limit(tmp_path):
+    jsonl = tmp_path / "records.jsonl"
+    with open(jsonl, "w", encoding="utf-8") as f:
+        for rec in (record("0001", [("BSB1", ["QLD"]), ("BSB2", ["QLD", "NSW"]), ("BSB3", ["VIC"])]),
+                    record("0002", [("BSB1", ["NSW"])]),
+                    record("0003", [("BSB4", ["QLD"])])):
+            f.write(json.dumps(rec) + "\n")
+    index = RTOIndex(build_index(jsonl_paths=[str(jsonl)], index_path=str(tmp_path / "index.sqlite")))
+    try:
+        plan = " ".join(row[-1] for row in index._db.execute(
+            "EXPLAIN QUERY PLAN SELECT item_id FROM scope_states WHERE state = 1"))
+        assert "USING PRIMARY KEY" in plan or "USING COVERING INDEX" in plan
+
+        found = index.find(state="QLD")
+        assert [rto["code"] for rto in found] == ["0001", "0003"]
+        assert [item["code"] for item in found[0]["items"]] == ["BSB1", "BSB2"]
+
+        # Two matching items on the first RTO must not use up a limit of two
+        limited = index.find(state="QLD", limit=2)
+        assert [rto["code"] for rto in limited] == ["0001", "0003"]
+        assert len(limited[0]["items"]) == 2
+        assert [rto["code"] for rto in index.find(state="NSW", component="BSB1")] == ["0002"]
+        assert [rto["code"] for rto in index.find(limit=1)] == ["0001"]
+    finally:
+        index.close()
@@ -0,0 +1,118 @@
+# test_scraper.py
+# Export CSV parsing (declared text columns, quoted cells that span lines), incremental planning
+# and the --resume journal.
+
+import asyncio
+from datetime import date
+
+import pandas as pd
+
+import scraper
+from records import ScopeItem
+from scraper import read_export_csv
+
+HEADER = "﻿Organisation Code,Legal Name,Status,Head Office Physical Address,ABN,Registration Start Date\r\n"
+ROWS = 40_000                 # a few MB, so the reader's blocks split inside quoted cells
+
+
+def export_csv():
+    rows = "".join(
+        f'{i:04d},"Acme Training {i}, Pty Ltd",Current,"1st Floor\r\n86 Gawler Place\r\nADELAIDE SA 5000",'
+        f"0400096685{i % 10},01/02/2020\r\n"
+        for i in range(ROWS)
+    )
+    return (HEADER + rows).encode("utf-8")
+
+
+def test_multiline_quoted_address():
+    data = export_csv()
+    chunks = [data[i:i + 65536] for i in range(0, len(data), 65536)]
+    df, rto_codes = read_export_csv(chunks)
+
+    assert len(rto_codes) == ROWS and rto_codes[:2] == ["0000", "0001"]
+    assert (df["Head Office Physical Address"] == "1st Floor\r\n86 Gawler Place\r\nADELAIDE SA 5000").all()
+    assert df.loc[1, "Legal Name"] == "Acme Training 1, Pty Ltd"
+    assert df.loc[3, "ABN"] == "04000966853"
+    assert df.loc[0, "Registration Start Date"].strftime("%Y-%m-%d") == "2020-02-01"
+
+
+class ListWriter:
+    def __init__(self):
+        self.rows = []
+
+    def writerow(self, values):
+        self.rows.append(values)
+
+
+def test_failed_refetch_keeps_known_scope(monkeypatch):
+    async def fake_fetch(client, code, semaphore, limiter, combined=False):
+        if code == "0007":
+            raise scraper.ScopeFetchError("503 after retries")
+        return [ScopeItem(code="BSB50120", title="Diploma of Business")], []
+
+    monkeypatch.setattr(scraper, "fetch_rto_scope_async", fake_fetch)
+    codes = ["0007", "0008"]
+    df = pd.DataFrame({column: [""] * len(codes) for column in scraper.PHASE2_COLUMNS})
+    df["Code"] = codes
+    known_scope = {"0007": ("[code: OLD]", "[code: OLDC]")}
+    fetched = set()
+    writer = ListWriter()
+
+    asyncio.run(scraper._stream_full_csv(
+        [writer], df, codes, codes, set(codes), known_scope, concurrency=2, rate_per_host=0,
+        combined=True, on_result=lambda code, quals, courses: fetched.add(code), preserve_order=True,
+    ))
+    assert writer.rows[0][-2:] == ["[code: OLD]", "[code: OLDC]"]
+    assert "BSB50120" in writer.rows[1][-2]
+    assert fetched == {"0008"}
+
+    state = {"0007": {"hash": "a", "fetched": "2026-01-01"}}
+    hashes = {"0007": "b", "0008": "c"}
+    new_state = scraper.next_scope_state(hashes, state, fetched, set(codes) - fetched, "2026-02-01")
+    assert new_state["0007"] == {"hash": "a", "fetched": "2026-01-01", "failed": "2026-02-01"}
+    assert new_state["0008"] == {"hash": "c", "fetched": "2026-02-01"}
+
+    to_fetch, counts = scraper.plan_incremental(
+        {"0007": "a", "0008": "c"}, new_state, {"0007": known_scope["0007"], "0008": ("", "")},
+        today=date(2026, 2, 2),
+    )
+    assert to_fetch == {"0007"} and counts["failed"] == 1
+
+
+def test_plan_incremental_reasons():
+    hashes = {"0001": "h1", "0002": "h2", "0003": "h3", "0004": "h4", "0005": "h5"}
+    state = {
+        "0001": {"hash": "h1", "fetched": "2026-02-01"},
+        "0002": {"hash": "old", "fetched": "2026-02-01"},
+        "0003": {"hash": "h3", "fetched": "2025-01-01"},
+        "0004": {"hash": "h4", "fetched": "2026-02-01", "failed": "2026-02-01"},
+    }
+    previous_scope = {code: ("", "") for code in hashes}
+    to_fetch, counts = scraper.plan_incremental(hashes, state, previous_scope, max_age_days=30,
+                                                today=date(2026, 2, 10))
+    assert to_fetch == {"0002", "0003", "0004", "0005"}
+    assert counts == {"new": 1, "changed": 1, "stale": 1, "failed": 1, "unchanged": 1}
+
+    # Known state but no scope in the previous CSV: fetch again
+    to_fetch, counts = scraper.plan_incremental({"0001": "h1"}, state, {}, today=date(2026, 2, 10))
+    assert to_fetch == {"0001"} and counts["new"] == 1
+
+
+def test_journal_resume_after_torn_line(tmp_path):
+    path = str(tmp_path / "run.journal.jsonl")
+    journal = scraper.ScopeJournal(path, fsync_every=1).open()
+    journal.append("7", "[code: A]", "")
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"code": "0008", "quals": "[co')   # killed mid-write
+
+    assert scraper.ScopeJournal(path).load() == {"0007": ("[code: A]", "")}
+
+    journal = scraper.ScopeJournal(path).open(resume=True)
+    journal.append("0008", "[code: B]", "[code: C]")
+    journal.close()
+    assert scraper.ScopeJournal(path).load() == {"0007": ("[code: A]", ""), "0008": ("[code: B]", "[code: C]")}
+
+    # A fresh (non-resumed) run starts the journal over
+    scraper.ScopeJournal(path).open().close()
+    assert scraper.ScopeJournal(path).load() == {}
@@ -1,76 +1,149 @@
+import os
+import io
 import csv
 import json
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from records import summary_line
+
+# Columns in output order; Qualifications/Courses are flattened by _format_nested_data
+HEADERS = [
+    "Code", "Legal Name", "Business Name", "Status", "ABN", "ACN", 
+    "RTO Type", "Web Address", "Registration Manager", "Initial Registration Date",
+    "Start Date", "End Date", "Legal Authority", "Chief Executive Contact Name",
+    "Chief Executive Title", "Chief Executive Phone", "Chief Executive Email",
+    "Registration Enquiries Contact Name", "Registration Enquiries Title",
+    "Registration Enquiries Phone", "Registration Enquiries Email",
+    "Public Enquiries Contact Name", "Public Enquiries Title",
+    "Public Enquiries Phone", "Public Enquiries Email", "Address",
+    "Qualifications", "Courses"
+]
+NESTED_COLUMNS = {"Qualifications", "Courses"}
+
+READ_CHUNK_BYTES = 1 << 20      # input is decoded 1 MB at a time
+WRITE_BUFFER_BYTES = 4 << 20    # CSV text is flushed to disk in ~4 MB chunks
 
 def _format_nested_data(nested_list):
     """
-    Formats a list of dictionaries (like qualifications or courses) into a single,
-    human-readable, multi-line string for a CSV cell.
+    Formats a list of qualifications or courses (Title Case dicts or records.ScopeItem objects)
+    into a single, human-readable, multi-line string for a CSV cell.
     """
     if not nested_list:
         return ""
     
-    formatted_lines = []
-    for item in nested_list:
-        # Creates a line like: "Code: BSB30120, Title: Certificate III in Business, Status: Current"
-        details = [
-            f"Code: {item.get('Code', 'N/A')}",
-            f"Title: {item.get('Title', 'N/A')}",
-            f"Status: {item.get('Status', 'N/A')}",
-            f"Start Date: {item.get('Start Date', 'N/A')}",
-            f"End Date: {item.get('End Date', 'N/A')}"
-        ]
-        formatted_lines.append(", ".join(details))
-    
+    # One "Code: .., Title: .., Status: .., Start Date: .., End Date: .." line per item.
     # Joins each item with a newline character. Excel will treat this as a multi-line cell.
-    return "\n".join(formatted_lines)
+    return "\n".join(summary_line(item) for item in nested_list)
+
+def _column_accessor(header):
+    """Per-column cell builder, resolved once instead of branching on the header for every cell."""
+    if header in NESTED_COLUMNS:
+        return lambda record: _format_nested_data(record.get(header))
+    return lambda record: record.get(header, "")
+
+
+ROW_ACCESSORS = tuple(_column_accessor(header) for header in HEADERS)
+
+
+def rto_row(record):
+    return [accessor(record) for accessor in ROW_ACCESSORS]
+
+
+def iter_json_records(input_path, chunk_bytes=READ_CHUNK_BYTES):
+    """
+    Yields records from JSONL, concatenated JSON objects or a top-level JSON array,
+    decoding one chunk at a time so memory stays bounded by the largest single record.
+    """
+    decoder = json.JSONDecoder()
+    with open(input_path, "r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        eof = False
+        in_array = None
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_bytes)
+            buf = buf[pos:] + chunk
+            pos = 0
+            eof = not chunk
+
+        while True:
+            # Skip whitespace and, inside an array, the separating commas
+            while True:
+                while pos < len(buf) and (buf[pos].isspace() or (in_array and buf[pos] == ",")):
+                    pos += 1
+                if pos < len(buf) or eof:
+                    break
+                fill()
+            if pos >= len(buf):
+                return
+            if in_array is None:
+                in_array = buf[pos] == "["
+                if in_array:
+                    pos += 1
+                continue
+            if in_array and buf[pos] == "]":
+                return
+
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            pos = end
+            if isinstance(value, list) and not in_array:
+                yield from value
+            else:
+                yield value
+
+
+def write_rows(records, csv_file, write_header=True):
+    """
+    Formats records into a StringIO batch and writes it to csv_file whenever it passes
+    WRITE_BUFFER_BYTES, so the disk sees a few large writes. Returns the row count.
+    Records that aren't JSON objects can't become rows; they are counted and reported.
+    """
+    batch = io.StringIO()
+    writer = csv.writer(batch)
+    if write_header:
+        writer.writerow(HEADERS)
+    count = skipped = 0
+    for record in records:
+        if not isinstance(record, dict):
+            skipped += 1
+            continue
+        writer.writerow(rto_row(record))
+        count += 1
+        if batch.tell() >= WRITE_BUFFER_BYTES:
+            csv_file.write(batch.getvalue())
+            batch.seek(0)
+            batch.truncate()
+    csv_file.write(batch.getvalue())
+    if skipped:
+        print(f"[WARN] Skipped {skipped} records that are not JSON objects.")
+    return count
+
 
 def convert_rto_json_to_csv(list_of_rto_data, output_csv_path):
     """
     Reads a list of RTO JSON objects, processes them, and writes to a CSV file.
 
     Args:
-        list_of_rto_data (list): A list of dictionaries, where each dictionary is an RTO record.
+        list_of_rto_data (iterable): RTO records (dicts); any iterable, it is consumed lazily.
         output_csv_path (str): The file path for the output CSV file.
     """
-    # Predefined headers based on the top-level keys in your JSON object.
-    headers = [
-        "Code", "Legal Name", "Business Name", "Status", "ABN", "ACN", 
-        "RTO Type", "Web Address", "Registration Manager", "Initial Registration Date",
-        "Start Date", "End Date", "Legal Authority", "Chief Executive Contact Name",
-        "Chief Executive Title", "Chief Executive Phone", "Chief Executive Email",
-        "Registration Enquiries Contact Name", "Registration Enquiries Title",
-        "Registration Enquiries Phone", "Registration Enquiries Email",
-        "Public Enquiries Contact Name", "Public Enquiries Title",
-        "Public Enquiries Phone", "Public Enquiries Email", "Address",
-        "Qualifications", "Courses"
-    ]
-
     print(f"Writing data to {output_csv_path}...")
 
     try:
         with open(output_csv_path, mode='w', newline='', encoding='utf-8') as csv_file:
-            writer = csv.writer(csv_file)
-
-            # Write the header row first
-            writer.writerow(headers)
-
-            # Process and write each RTO record
-            for rto_record in list_of_rto_data:
-                row = []
-                for header in headers:
-                    if header == "Qualifications":
-                        # Format the nested qualifications list into a single string
-                        row.append(_format_nested_data(rto_record.get("Qualifications")))
-                    elif header == "Courses":
-                        # Format the nested courses list into a single string
-                        row.append(_format_nested_data(rto_record.get("Courses")))
-                    else:
-                        # Get the value for other top-level fields, default to empty string if not found
-                        row.append(rto_record.get(header, ""))
-                
-                writer.writerow(row)
+            count = write_rows(list_of_rto_data, csv_file)
         
-        print("✅ Successfully created CSV file.")
+        print(f"✅ Successfully created CSV file ({count} rows).")
 
     except IOError as e:
         print(f"❌ Error writing to file: {e}")
@@ -78,8 +151,97 @@ def convert_rto_json_to_csv(list_of_rto_data, output_csv_path):
         print(f"❌ An unexpected error occurred: {e}")
 
 
+# --- Streaming file conversion ---
+def _is_jsonl(input_path):
+    """
+    True when the first line is a complete JSON object, i.e. the file can be split on newlines.
+    (A one-line JSON array is a single document, not JSONL.)
+    """
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                try:
+                    return isinstance(json.loads(line), dict)
+                except json.JSONDecodeError:
+                    return False
+    return False
+
+
+def _split_ranges(input_path, parts):
+    """Byte ranges covering the file, each ending on a line boundary."""
+    size = os.path.getsize(input_path)
+    bounds = [0]
+    with open(input_path, "rb") as f:
+        for i in range(1, parts):
+            f.seek(max(size * i // parts, bounds[-1]))
+            f.readline()
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _iter_jsonl_range(input_path, start, end):
+    with open(input_path, "rb") as f:
+        f.seek(start)
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                yield json.loads(line)
+
+
+def _convert_range(input_path, start, end, part_path):
+    """Worker: one byte range of a JSONL file -> a header-less CSV part file."""
+    with open(part_path, "w", newline="", encoding="utf-8") as part:
+        return write_rows(_iter_jsonl_range(input_path, start, end), part, write_header=False)
+
+
+def convert_json_file_to_csv(input_path, output_csv_path, workers=1):
+    """
+    Streams a JSONL / JSON-array extraction file into the CSV without loading it.
+    With workers > 1 a JSONL input is split into byte ranges converted in parallel
+    processes and concatenated in order; other layouts fall back to one process.
+    Returns the number of rows written.
+    """
+    print(f"Writing data to {output_csv_path}...")
+    if workers > 1 and not _is_jsonl(input_path):
+        print("[INFO] Input is not line-delimited; converting in a single process")
+        workers = 1
+
+    if workers <= 1:
+        with open(output_csv_path, "w", newline="", encoding="utf-8") as csv_file:
+            count = write_rows(iter_json_records(input_path), csv_file)
+        print(f"✅ Successfully created CSV file ({count} rows).")
+        return count
+
+    ranges = _split_ranges(input_path, workers)
+    tmp_dir = tempfile.mkdtemp(prefix="to_csv_", dir=os.path.dirname(os.path.abspath(output_csv_path)))
+    try:
+        part_paths = [os.path.join(tmp_dir, f"part_{i:04d}.csv") for i in range(len(ranges))]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            counts = list(pool.map(_convert_range, [input_path] * len(ranges),
+                                   [a for a, _ in ranges], [b for _, b in ranges], part_paths))
+        with open(output_csv_path, "w", newline="", encoding="utf-8") as csv_file:
+            csv.writer(csv_file).writerow(HEADERS)
+            for part_path in part_paths:
+                with open(part_path, "r", newline="", encoding="utf-8") as part:
+                    shutil.copyfileobj(part, csv_file, WRITE_BUFFER_BYTES)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    count = sum(counts)
+    print(f"✅ Successfully created CSV file ({count} rows from {len(ranges)} parts).")
+    return count
+
+
 # --- Example Usage ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert RTO extraction JSON/JSONL to CSV.")
+    parser.add_argument("input", nargs="?", help="JSONL, concatenated JSON or JSON array file (omit for the sample record)")
+    parser.add_argument("--output", default="rto_output.csv")
+    parser.add_argument("--workers", type=int, default=1, help="processes for large JSONL inputs")
+    args = parser.parse_args()
+
     # Your sample JSON object provided in the prompt
     sample_rto_data = [
         {
@@ -313,7 +475,10 @@ if __name__ == "__main__":
         # You can add more RTO JSON objects to this list
     ]
     
-    output_filename = 'rto_output.csv'
+    output_filename = args.output
     
-    # Call the function with your data
-    convert_rto_json_to_csv(sample_rto_data, output_filename)
\ No newline at end of file
+    # Stream the given file, or call the function with the sample data
+    if args.input:
+        convert_json_file_to_csv(args.input, output_filename, workers=args.workers)
+    else:
+        convert_rto_json_to_csv(sample_rto_data, output_filename)
\ No newline at end of file
@@ -0,0 +1,170 @@
+# transport.py
+# Pooled HTTP transport for the training.gov.au APIs, shared by the sync and async scope paths.
+
+import importlib.util
+import httpx
+from http_cache import CachingTransport, AsyncCachingTransport
+
+# ------------------------
+# CONFIG
+# ------------------------
+POOL_MAX_CONNECTIONS = 16     # hard cap on open sockets per client
+POOL_MAX_KEEPALIVE = 16       # idle connections kept warm for reuse
+KEEPALIVE_EXPIRY = 30.0       # seconds an idle connection stays in the pool
+REQUEST_TIMEOUT = 15.0
+
+# HTTP/2 multiplexing needs the optional `h2` package; fall back to HTTP/1.1 keep-alive without it.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# httpx advertises br/zstd on its own when `brotli`/`zstandard` are installed.
+DEFAULT_HEADERS = {"Accept": "application/json"}
+
+
+# ------------------------
+# CONNECTION STATS
+# ------------------------
+class ConnectionStats:
+    """
+    Counts requests against new TCP/TLS connections so we can see how many handshakes
+    the pool saved. Fed by httpcore trace events and httpx response hooks.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.cache_hits = 0
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.http_versions = {}
+
+    def on_trace(self, event_name):
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    def on_response(self, response):
+        # Fresh cache hits never touched the network; 304 revalidations did.
+        if response.extensions.get("cache_source") == "cache" or response.extensions.get("offline_miss"):
+            self.cache_hits += 1
+            return
+        self.requests += 1
+        version = response.http_version
+        self.http_versions[version] = self.http_versions.get(version, 0) + 1
+
+    @property
+    def reused(self):
+        return max(self.requests - self.connections_opened, 0)
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "reused": self.reused,
+            "cache_hits": self.cache_hits,
+            "http_versions": dict(self.http_versions),
+        }
+
+    def summary(self):
+        versions = ", ".join(f"{v}={n}" for v, n in sorted(self.http_versions.items())) or "none"
+        return (f"{self.requests} requests over {self.connections_opened} connections "
+                f"({self.reused} reused, {self.tls_handshakes} TLS handshakes; {versions})")
+
+
+STATS = ConnectionStats()
+
+
+# ------------------------
+# CLIENT FACTORIES
+# ------------------------
+def _limits(max_connections, max_keepalive):
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+_cache = None
+
+
+def set_cache(cache):
+    """
+    Put an http_cache.ResponseCache (or None) in front of every client built from here on.
+    Drops the shared sync client so the next get_client() picks the cache up.
+    """
+    global _cache
+    _cache = cache
+    close_client()
+
+
+def get_cache():
+    return _cache
+
+
+def make_client(max_connections=POOL_MAX_CONNECTIONS, max_keepalive=POOL_MAX_KEEPALIVE,
+                http2=HTTP2_AVAILABLE, timeout=REQUEST_TIMEOUT, stats=STATS, cache=None):
+    """
+    Build a pooled, keep-alive httpx.Client that reports into `stats`, optionally behind
+    a response cache (defaults to the one registered with set_cache).
+    """
+    def trace(event_name, info):
+        stats.on_trace(event_name)
+
+    def on_request(request):
+        request.extensions["trace"] = trace
+
+    pool = httpx.HTTPTransport(http2=http2 and HTTP2_AVAILABLE, limits=_limits(max_connections, max_keepalive))
+    cache = cache or _cache
+    return httpx.Client(
+        transport=CachingTransport(pool, cache) if cache else pool,
+        timeout=timeout,
+        headers=DEFAULT_HEADERS,
+        event_hooks={"request": [on_request], "response": [stats.on_response]},
+    )
+
+
+def make_async_client(max_connections=POOL_MAX_CONNECTIONS, max_keepalive=POOL_MAX_KEEPALIVE,
+                      http2=HTTP2_AVAILABLE, timeout=REQUEST_TIMEOUT, stats=STATS, cache=None):
+    """
+    Async twin of make_client, for the asyncio scope fetcher.
+    """
+    async def trace(event_name, info):
+        stats.on_trace(event_name)
+
+    async def on_request(request):
+        request.extensions["trace"] = trace
+
+    async def on_response(response):
+        stats.on_response(response)
+
+    pool = httpx.AsyncHTTPTransport(http2=http2 and HTTP2_AVAILABLE, limits=_limits(max_connections, max_keepalive))
+    cache = cache or _cache
+    return httpx.AsyncClient(
+        transport=AsyncCachingTransport(pool, cache) if cache else pool,
+        timeout=timeout,
+        headers=DEFAULT_HEADERS,
+        event_hooks={"request": [on_request], "response": [on_response]},
+    )
+
+
+_shared_client = None
+
+
+def get_client():
+    """
+    Lazily create the process-wide sync client so every get_scope_data call shares one pool.
+    """
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = make_client()
+    return _shared_client
+
+
+def close_client():
+    global _shared_client
+    if _shared_client is not None:
+        _shared_client.close()
+        _shared_client = None